@@ -0,0 +1,128 @@
+"""
+Author - Rajnish Tiwari
+
+Batch planning of many start/goal queries over the same obstacle map.
+The queries of a scenario file are spread over a pool of processes,
+every query is planned headless with its own seed and the results are
+written as JSON Lines in the order they finish.
+
+Scenario file
+	{"planner": "RRT*", "iter_limit": false, "seed": 0,
+	 "obstacles": [... map as read by maps.py ...],
+	 "queries": [{"start": [20, 20], "goal": [900, 550]},
+	             {"start": [50, 500], "goal": [800, 40], "planner": "RRT"}]}
+
+	python batch.py scenario.json --processes 8 --output results.jsonl
+
+With "tree": "map.tree" in the scenario (or --tree) RRT and RRT* queries
+are warm started from a tree stored by store.save on the same map, the
+file is memory mapped so all workers share it.
+"""
+
+import argparse, json, random, sys, time
+import multiprocessing
+import numpy as np
+
+import maps
+import planners
+import collision
+import store
+
+obstacleSet = None
+warmTree = None
+
+
+def initWorker(obstacleData, treePath = None):
+	"""
+	build the obstacle set and map the stored tree once in every
+	worker process
+	"""
+	global obstacleSet, warmTree
+	obstacleSet = collision.ObstacleSet(maps.fromData(obstacleData))
+	if treePath != None:
+		warmTree, obstacles = store.load(treePath)
+
+
+def runQuery(task):
+	"""
+	plan one query in a worker, task is the tuple
+	(query number, planner name, start, goal, iter_limit, seed)
+	"""
+	i, name, start, goal, iter_limit, seed = task
+	random.seed(seed)
+	np.random.seed(seed)
+
+	kwargs = {}
+	if warmTree != None and name in ('RRT', 'RRT*'):
+		kwargs['warm'] = warmTree
+
+	t = time.time()
+	planner = planners.makePlanner(name, start, goal, obstacleSet, iter_limit, **kwargs)
+	path, tree = planner.plan()
+	t = time.time() - t
+
+	return {'query': i, 'planner': name, 'seed': seed, 'start': start, 'goal': goal,
+			'path': path, 'cost': planners.pathCost(path), 'iterations': planner.count,
+			'nodes': planners.countNodes(tree), 'time': t}
+
+
+def getTasks(scenario, planner = None, iter_limit = None, seed = None):
+	"""
+	return the list of tasks of scenario, planner, iter_limit and seed
+	override the values stored in the scenario file
+	"""
+	planner = planner or scenario.get('planner', 'RRT*')
+	iter_limit = iter_limit if iter_limit != None else scenario.get('iter_limit', False)
+	seed = seed if seed != None else scenario.get('seed', 0)
+
+	tasks = []
+	for i, q in enumerate(scenario['queries']):
+		tasks.append((i, q.get('planner', planner), tuple(q['start']), tuple(q['goal']),
+					q.get('iter_limit', iter_limit), q.get('seed', seed + i)))
+	return tasks
+
+
+def runBatch(scenario, processes = None, planner = None, iter_limit = None, seed = None, tree = None):
+	"""
+	plan all queries of scenario on a pool of processes, yield the
+	result of each query as soon as it finishes
+	"""
+	tasks = getTasks(scenario, planner, iter_limit, seed)
+	tree = tree or scenario.get('tree')
+	pool = multiprocessing.Pool(processes, initWorker, (scenario['obstacles'], tree))
+	try:
+		for result in pool.imap_unordered(runQuery, tasks):
+			yield result
+	finally:
+		pool.terminate()
+		pool.join()
+
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = 'plan all queries of a scenario file')
+	parser.add_argument('scenario', help = 'scenario file with obstacles and queries')
+	parser.add_argument('--planner', choices = sorted(planners.PLANNERS), help = 'planner used for every query')
+	parser.add_argument('--iter-limit', action = 'store_true', default = None,
+						help = 'run RRT* and BI_RRT* up to maximum iteration')
+	parser.add_argument('--seed', type = int, help = 'seed of first query, query i uses seed + i')
+	parser.add_argument('--processes', type = int, help = 'number of worker processes (default all cores)')
+	parser.add_argument('--tree', help = 'tree file of store.save to warm start RRT and RRT* queries')
+	parser.add_argument('--output', help = 'JSON Lines result file (default stdout)')
+	args = parser.parse_args(argv)
+
+	with open(args.scenario) as f:
+		scenario = json.load(f)
+
+	out = open(args.output, 'w') if args.output else sys.stdout
+	try:
+		for result in runBatch(scenario, args.processes, args.planner, args.iter_limit, args.seed, args.tree):
+			out.write(json.dumps(result) + '\n')
+			out.flush()
+	finally:
+		if out is not sys.stdout:
+			out.close()
+
+
+if __name__ == '__main__':
+
+	main()
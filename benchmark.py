@@ -0,0 +1,357 @@
+"""
+Author - Rajnish Tiwari
+
+Reproducible benchmark of RRT, RRT*, Bi-RRT* and PRM*. Every planner is run
+headless on fixed seeded scenarios and the following is reported
+
+	success  - fraction of the runs which found a path
+	iter/s   - planner iterations per second
+	first    - seconds until the first path to the goal region is found
+	cost     - length of the final path
+	nodes    - number of nodes in the tree(s)
+	memory   - peak memory allocated during the run in kB
+	checks   - edges checked for obstacles per iteration, edges found in
+	           the edge cache of the obstacle set are not counted
+	replan   - with --dynamic, seconds to repair the tree and find a path
+	           again after a circle is dropped on the middle of the path
+	           (RRT* and Bi-RRT*)
+	converge - seconds until the path cost is within the converge
+	           fraction of the best cost any planner found for the
+	           same scenario and seed
+
+The metrics other than success are the median over the runs, runs
+without a path are left out of first, cost, replan and converge.
+
+Results can be stored as a baseline and later runs compared against it,
+any metric which is worse than the baseline by more than the threshold,
+or which has no value any more, is reported as regression and the exit
+status is 1.
+
+	python benchmark.py --save baseline.json
+	python benchmark.py --compare baseline.json --threshold 0.1
+
+With --profile the time of every phase of every timed run (see
+profiler.py) is stored in the given JSON file with its iteration trace,
+the phases and the edge cache hits summed over the runs of each case are
+printed.
+With --record the events of every timed run are written as event log
+(see recorder.py) to the given directory, replay.py draws them.
+"""
+
+import argparse, json, os, random, sys, tempfile, time
+import tracemalloc
+import numpy as np
+
+import envr
+import planners
+import profiler
+import recorder
+import store
+from observer import Observer
+from rrt_star import CHECK_MODES
+
+
+def randomScenario(seed):
+	"""
+	four random obstacles of envr.getObstacle
+	"""
+	random.seed(seed)
+	obstacles = envr.getObstacle(4)
+	return obstacles, (15, 15), (envr.XDIM - 15, envr.YDIM - 15)
+
+def narrowScenario(seed):
+	"""
+	wall across the middle of the screen with a gap of 20 pixels
+	"""
+	wall = envr.XDIM/2 - 10
+	gapY = 150 + (seed*97) % 300
+	obstacles = [envr.rectangle(envr.black, wall, 0, 20, gapY),
+				envr.rectangle(envr.black, wall, gapY + 20, 20, envr.YDIM - gapY - 20)]
+	return obstacles, (50, envr.YDIM/2), (envr.XDIM - 50, envr.YDIM/2)
+
+def clutteredScenario(seed):
+	"""
+	grid of small circles moved randomly around their grid points
+	"""
+	random.seed(seed)
+	obstacles = []
+	for x in range(80, envr.XDIM - 40, 80):
+		for y in range(60, envr.YDIM - 30, 80):
+			obstacles.append(envr.circle(envr.black, x + random.randint(-15, 15), y + random.randint(-15, 15), 22))
+	return obstacles, (15, 15), (envr.XDIM - 15, envr.YDIM - 15)
+
+
+SCENARIOS = {'random': randomScenario, 'narrow': narrowScenario, 'cluttered': clutteredScenario}
+
+# metrics where a higher value is better, all others are better when lower
+HIGHER_IS_BETTER = ('success', 'iter/s')
+METRICS = ('success', 'iter/s', 'first', 'cost', 'nodes', 'checks', 'memory', 'converge', 'replan')
+CONVERGE = 0.05
+DYNAMIC_RADIUS = 25 # radius of the obstacle dropped on the path by --dynamic
+WARM_SEED = 1000 # seed offset of the runs growing the trees for --warm
+
+
+class BenchObserver(Observer):
+	"""
+	observer recording the time of the first solution and the
+	time of every cheaper path
+	"""
+	def __init__(self):
+		self.startTime = time.time()
+		self.firstSolution = None
+		self.costs = []
+
+	def goalReached(self, count):
+		self.firstSolution = time.time() - self.startTime
+
+	def costImproved(self, count, cost):
+		self.costs.append((time.time() - self.startTime, cost))
+
+	def pathFound(self, path):
+		self.costs.append((time.time() - self.startTime, planners.pathCost(path)))
+
+
+def buildWarmtree(scenario, name, seed, max_iter):
+	"""
+	grow a tree of planner name on scenario with another seed, store it
+	in a temporary file and return the tree loaded from there
+	"""
+	obstacles, start, goal = SCENARIOS[scenario](seed)
+	random.seed(seed + WARM_SEED)
+	np.random.seed(seed + WARM_SEED)
+	planner = planners.makePlanner(name, start, goal, obstacles, True, max_iter = max_iter)
+	planner.plan()
+
+	fd, path = tempfile.mkstemp(suffix = '.tree')
+	os.close(fd)
+	try:
+		store.save(path, planner.tree, obstacles)
+		tree, obstacles = store.load(path)
+	finally:
+		os.remove(path)
+	return tree
+
+
+def runOnce(scenario, name, seed, iter_limit, max_iter, memory = False, informed = False, check = 'eager',
+			dynamic = False, warm = False, profile = False, parallel = False, batch = 1, record = None):
+	"""
+	run planner name on scenario with given seed, return the metrics
+	and the list of (time, cost) of every improved path as 'costs',
+	with profile the report of the profiler as 'profile'. With record
+	the events are logged to a file in directory record
+	"""
+	kwargs = {}
+	if warm and name in ('RRT', 'RRT*'):
+		kwargs['warm'] = buildWarmtree(scenario, name, seed, max_iter)
+
+	obstacles, start, goal = SCENARIOS[scenario](seed)
+	random.seed(seed)
+	np.random.seed(seed)
+
+	if memory:
+		tracemalloc.start()
+
+	if informed and name == 'RRT*':
+		kwargs['informed'] = True
+	if name == 'RRT*' or name == 'BI_RRT*' and check != 'deferred':
+		kwargs['check'] = check
+	if name != 'PRM*':
+		kwargs['max_iter'] = max_iter
+	if parallel and name == 'BI_RRT*':
+		kwargs['parallel'] = True
+	if batch > 1 and name != 'PRM*':
+		kwargs['batch'] = batch
+	observer = BenchObserver()
+	events = observer
+	if record:
+		log = os.path.join(record, '%s-%s-%d.events' % (scenario, name.replace('*', 'star'), seed))
+		events = recorder.Recorder(log, obstacles, start, goal, observer)
+	planner = planners.makePlanner(name, start, goal, obstacles, iter_limit, observer = events, **kwargs)
+	if profile:
+		profile = profiler.Profiler(trace = True)
+		profile.attach(planner)
+	path, tree = planner.plan()
+	t = time.time() - observer.startTime
+
+	result = {'iter/s': planner.count/t if planner.count else None, 'first': observer.firstSolution,
+			'checks': planner.obstacleSet.segmentChecks/float(max(planner.count, 1)),
+			'cost': planners.pathCost(path), 'nodes': planners.countNodes(tree), 'costs': observer.costs}
+
+	if dynamic and path != None and hasattr(planner, 'replan'):
+		x, y = path[len(path)//2]
+		t = time.time()
+		planner.addObstacle(envr.circle(envr.black, x, y, DYNAMIC_RADIUS))
+		path, tree = planner.replan()
+		if path != None:
+			result['replan'] = time.time() - t
+
+	if record:
+		events.close()
+
+	if profile:
+		result['profile'] = profile.report()
+
+	if memory:
+		result['memory'] = tracemalloc.get_traced_memory()[1]/1024.0
+		tracemalloc.stop()
+
+	return result
+
+
+def median(values):
+	"""
+	median of the values which are not None, None if there is none
+	"""
+	values = sorted(v for v in values if v != None)
+	if len(values) == 0:
+		return None
+	return values[len(values)//2]
+
+
+def convergeTime(costs, bestCost, fraction):
+	"""
+	time of the first cost of the (time, cost) list within fraction of
+	bestCost, None if it is never reached
+	"""
+	for t, cost in costs:
+		if cost <= bestCost*(1 + fraction):
+			return t
+	return None
+
+
+def runBenchmark(scenarios, names, repeat, iter_limit, max_iter, memory = True, informed = False,
+				converge = CONVERGE, check = 'eager', dynamic = False, warm = False, profiles = None, parallel = False,
+				batch = 1, record = None):
+	"""
+	run every planner on every scenario repeat times with seeds
+	0 .. repeat-1 and return the median of each metric. If profiles is
+	a dict the profiler reports of the runs of every case are put in it
+	"""
+	results = {}
+	for scenario in scenarios:
+		runs = {}
+		for name in names:
+			runs[name] = [runOnce(scenario, name, seed, iter_limit, max_iter, False, informed, check, dynamic, warm,
+								profiles != None, parallel, batch, record) for seed in range(repeat)]
+			if memory:
+				# memory is traced in separate runs so it does not slow the timed ones
+				for seed in range(repeat):
+					runs[name][seed]['memory'] = runOnce(scenario, name, seed, iter_limit, max_iter,
+														True, informed, check, dynamic, warm, False, parallel, batch)['memory']
+
+		for seed in range(repeat):
+			costs = [c for name in names for t, c in runs[name][seed]['costs']]
+			if costs:
+				for name in names:
+					runs[name][seed]['converge'] = convergeTime(runs[name][seed]['costs'], min(costs), converge)
+
+		for name in names:
+			results[scenario + '/' + name] = dict((m, median([r.get(m) for r in runs[name]])) for m in METRICS)
+			results[scenario + '/' + name]['success'] = sum(r['cost'] != None for r in runs[name])/float(repeat)
+			if profiles != None:
+				profiles[scenario + '/' + name] = [r['profile'] for r in runs[name]]
+	return results
+
+
+def compare(results, baseline, threshold):
+	"""
+	return the list of (case, metric, baseline value, value) for every
+	metric which is worse than the baseline by more than threshold or
+	which had a value in the baseline and has none now
+	"""
+	regressions = []
+	for case in sorted(results):
+		if case not in baseline:
+			continue
+		for m in METRICS:
+			old = baseline[case].get(m)
+			new = results[case].get(m)
+			if old != None and new == None:
+				regressions.append((case, m, old, new))
+				continue
+			if old == None or new == None or old == 0:
+				continue
+
+			if m in HIGHER_IS_BETTER:
+				worse = new < old*(1 - threshold)
+			else:
+				worse = new > old*(1 + threshold)
+			if worse:
+				regressions.append((case, m, old, new))
+	return regressions
+
+
+def formatValue(v):
+	if v == None:
+		return '-'
+	return '%.3f' % v if v < 100 else '%.0f' % v
+
+def printResults(results):
+	print('%-22s' % 'case' + ''.join('%12s' % m for m in METRICS))
+	for case in sorted(results):
+		print('%-22s' % case + ''.join('%12s' % formatValue(results[case].get(m)) for m in METRICS))
+
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = 'benchmark the motion planning algorithms')
+	parser.add_argument('--scenario', action = 'append', choices = sorted(SCENARIOS),
+						help = 'scenario to run, can be repeated (default all)')
+	parser.add_argument('--planner', action = 'append', choices = sorted(planners.PLANNERS),
+						help = 'planner to run, can be repeated (default all)')
+	parser.add_argument('--repeat', type = int, default = 3, help = 'number of seeds per case')
+	parser.add_argument('--iter-limit', action = 'store_true', help = 'run RRT* and BI_RRT* up to max iteration')
+	parser.add_argument('--max-iter', type = int, default = 2000, help = 'maximum number of iterations')
+	parser.add_argument('--informed', action = 'store_true', help = 'use informed sampling in RRT*')
+	parser.add_argument('--check', choices = CHECK_MODES, default = 'eager',
+						help = 'edge collision checks of RRT*, deferred is not used by BI_RRT*')
+	parser.add_argument('--dynamic', action = 'store_true',
+						help = 'block the found path with a new obstacle and measure the replanning')
+	parser.add_argument('--batch', type = int, default = 1, help = 'points expanded together by RRT, RRT* and BI_RRT*')
+	parser.add_argument('--parallel', action = 'store_true', help = 'grow both trees of BI_RRT* in worker processes')
+	parser.add_argument('--warm', action = 'store_true',
+						help = 'start RRT and RRT* from a stored tree grown on the same map')
+	parser.add_argument('--converge', type = float, default = CONVERGE,
+						help = 'fraction of the best known cost reported as converge time')
+	parser.add_argument('--no-memory', action = 'store_true', help = 'skip the peak memory runs')
+	parser.add_argument('--profile', help = 'store the phase times of every run in this JSON file')
+	parser.add_argument('--record', help = 'write an event log of every run to this directory')
+	parser.add_argument('--save', help = 'store the results as baseline file')
+	parser.add_argument('--compare', help = 'baseline file to compare the results with')
+	parser.add_argument('--threshold', type = float, default = 0.1,
+						help = 'relative change of a metric reported as regression')
+	args = parser.parse_args(argv)
+
+	scenarios = args.scenario or sorted(SCENARIOS)
+	names = args.planner or sorted(planners.PLANNERS)
+	profiles = {} if args.profile else None
+	if args.record and not os.path.isdir(args.record):
+		os.makedirs(args.record)
+	results = runBenchmark(scenarios, names, args.repeat, args.iter_limit, args.max_iter, not args.no_memory,
+						args.informed, args.converge, args.check, args.dynamic, args.warm, profiles, args.parallel,
+						args.batch, args.record)
+	printResults(results)
+
+	if args.profile:
+		with open(args.profile, 'w') as f:
+			json.dump(profiles, f, sort_keys = True)
+		for case in sorted(profiles):
+			print('\nprofile of %s' % case)
+			profiler.printReport(profiles[case])
+
+	if args.save:
+		with open(args.save, 'w') as f:
+			json.dump(results, f, indent = 1, sort_keys = True)
+
+	if args.compare:
+		with open(args.compare) as f:
+			baseline = json.load(f)
+		regressions = compare(results, baseline, args.threshold)
+		for case, m, old, new in regressions:
+			print('regression %s %s: %s -> %s' % (case, m, formatValue(old), formatValue(new)))
+		if regressions:
+			sys.exit(1)
+
+
+if __name__ == '__main__':
+
+	main()
@@ -6,42 +6,114 @@ between two given point start loaction and goal
 loaction while avoiding the given obstacles. It can be terminated
 either once reached to goal location or when max iteration reached
 depending on selection
+
+With parallel = True both trees grow at the same time in two worker
+processes. Every worker publishes the nodes of its tree in shared
+memory buffers and sets a shared event every few nodes, the planner
+process waits on that event, checks the new nodes of each tree for a connection to
+the other tree and tells the observer about them. The workers are seeded from the random module so their
+trees are reproducible, but where the search stops depends on how
+fast the workers run, only the serial mode is fully deterministic.
 """
-import math, sys, random, pygame
-import envr
+import math, random, time
+import multiprocessing
+import numpy as np
+import collision
 
 from rrt_star import RRTStar
+from tree import Tree
+from observer import Observer
+from expansion import delta
 
-delta = 10.0
-MIN_DISTANCE_TO_ADD = 1.0
 MAX_ITER = 5000
+PUBLISH_EVERY = 16 # nodes a worker adds before it wakes the planner process
+WAIT_TIMEOUT = 0.1 # seconds the planner process waits for new nodes before it looks for dead workers
+
+
+def makeBuffers(capacity):
+	"""
+	shared memory buffers of one tree grown by a worker, size is the
+	number of nodes published so far
+	"""
+	return {'pos': multiprocessing.RawArray('d', 2*capacity), 'parent': multiprocessing.RawArray('i', capacity),
+			'cost': multiprocessing.RawArray('d', capacity), 'size': multiprocessing.RawValue('i', 0)}
+
 
-gamma = 300
-expansionDis = 4
+def bufferViews(buffers):
+	"""
+	return numpy arrays pos, parent and cost sharing the memory of buffers
+	"""
+	pos = np.frombuffer(buffers['pos'], dtype = np.float64).reshape(-1, 2)
+	parent = np.frombuffer(buffers['parent'], dtype = np.int32)
+	cost = np.frombuffer(buffers['cost'], dtype = np.float64)
+	return pos, parent, cost
 
-screen = envr.screen
 
+def growTree(start, goal, obstacleSet, kwargs, seed, iterations, buffers, stop, published):
+	"""
+	worker process growing RRT* from start for the given number of
+	iterations or until stop is set. Every new node and every node
+	rewired or made cheaper is written to buffers before the new size
+	is published. The event published is set every PUBLISH_EVERY nodes
+	and when the worker ends
+	"""
+	random.seed(seed)
+	np.random.seed(seed)
+	planner = RRTStar(start, goal, obstacleSet, **kwargs)
+	pos, parent, cost = bufferViews(buffers)
+	pos[0] = start
+	parent[0] = -1
+	cost[0] = 0.0
+	buffers['size'].value = 1
 
-class Node():
-    def __init__(self, pos, parent = None):
-        self.pos = pos
-        self.parent = parent
-        self.cost = 0
+	try:
+		for i in range(iterations):
+			if stop.value:
+				break
 
+			newNode = planner.getNext()
+			tree = planner.tree
+			pos[newNode] = tree.pos[newNode]
+			for n in [newNode] + planner.changedNodes:
+				parent[n] = tree.parent[n]
+				cost[n] = tree.cost[n]
+			buffers['size'].value = newNode + 1
+			if i % PUBLISH_EVERY == 0:
+				published.set()
+	finally:
+		published.set()
 
 
 class BIRRTStar():
-	def __init__(self, start, goal, obstacles, iter_limit = False):
+	def __init__(self, start, goal, obstacles, iter_limit = False, max_iter = MAX_ITER, index = 'grid',
+				sample = 'uniform', check = 'eager', parallel = False, batch = 1, observer = None):
 		"""
 		initialize the Bi-directional RRT* with RRT*  from start
-		and RRT* from goal
+		and RRT* from goal, the path through the connection of both
+		trees is never validated again so deferred collision checks
+		are not supported. With parallel the trees are grown by two
+		worker processes
 		"""
-		self.start = Node(start)
-		self.goalNode = Node(goal)
+		if check == 'deferred':
+			raise ValueError('deferred collision checks are not supported by Bi-RRT*')
+
+		self.start = start
+		self.goal = goal
 		self.obstacles = obstacles
 		self.iter_limit = iter_limit
-		self.RRT_from_start = RRTStar(start, goal, obstacles)
-		self.RRT_from_goal = RRTStar(goal, start, obstacles)
+		self.MAX_ITER = max_iter
+		self.sample = sample
+		self.parallel = parallel
+		self.goalCount = None
+		self.connection = None, None
+		self.connectionCost = float('inf')
+		self.cancelled = False
+		self.observer = observer if observer != None else Observer()
+		self.obstacleSet = collision.asObstacleSet(obstacles)
+		self.RRT_from_start = RRTStar(start, goal, self.obstacleSet, index = index, sample = sample,
+									check = check, batch = batch, observer = self.observer)
+		self.RRT_from_goal = RRTStar(goal, start, self.obstacleSet, index = index, sample = sample,
+									check = check, batch = batch, observer = self.observer)
 
 	def dist(self, p1, p2):
 		"""
@@ -52,34 +124,354 @@ class BIRRTStar():
 	def getPath(self, node_from_start, node_from_goal):
 		"""
 		connect node of RRT* from start and RRT* from goal to 
-		make path from start region to goal region
+		make path from start region to goal region, return it as
+		list of positions
 		"""
-		currNode = node_from_goal
-		parentNode = node_from_start
-		while currNode != None:
-			tmpNode = currNode.parent
-			currNode.parent = parentNode
-			parentNode = currNode
-			currNode = tmpNode
+		path_to_goal = self.RRT_from_goal.tree.getPath(node_from_goal)
+		path_to_goal.reverse()
+		return self.RRT_from_start.tree.getPath(node_from_start) + path_to_goal
 
 	def getBestnodes(self):
 		"""
 		Return the pair of nodes from RRT* from start and RRT* from goal
-		which have the lowest path cost from start to goal region
+		which have the lowest path cost from start to goal region, the
+		edge between them included
 		"""
 		best_from_start = None
 		best_from_goal = None
 		minCost = float('inf')
 
-		for s in self.RRT_from_start.nodes:
-			for g in self.RRT_from_goal.nodes:
-				if self.dist(s.pos, g.pos) <= delta and (s.cost+ g.cost) < minCost:
-					best_from_start = s 
+		start_tree = self.RRT_from_start.tree
+
+		for s in range(len(start_tree)):
+			for g in self.RRT_from_goal.index.near(start_tree.getPos(s), delta):
+				cost = self.bridgeCost(s, g)
+				if cost < minCost and self.bridgeFree(s, g):
+					best_from_start = s
 					best_from_goal = g
-					minCost = s.cost+ g.cost
+					minCost = cost
 
 		return best_from_start, best_from_goal
 
+	def updateConnection(self, nodes, from_start):
+		"""
+		update the best connection between both trees with the nodes
+		which are new or got cheaper in RRT* from start (from_start) or
+		in RRT* from goal, so the pair of getBestnodes is always known
+		"""
+		if from_start:
+			tree, other = self.RRT_from_start, self.RRT_from_goal
+		else:
+			tree, other = self.RRT_from_goal, self.RRT_from_start
+
+		for n in nodes:
+			for m in other.index.near(tree.tree.getPos(n), delta):
+				connection = (n, m) if from_start else (m, n)
+				cost = self.bridgeCost(*connection)
+				if cost < self.connectionCost and self.bridgeFree(*connection):
+					self.connectionCost = cost
+					self.connection = connection
+
+	def grow(self, from_start):
+		"""
+		add one node to RRT* from start (from_start) or to RRT* from
+		goal and update the best connection, return the new node.
+		The observer is told about every cheaper connection
+		"""
+		tree = self.RRT_from_start if from_start else self.RRT_from_goal
+		connectionCost = self.connectionCost
+		newNode = tree.getNext()
+		self.updateConnection([newNode] + tree.changedNodes, from_start)
+		if self.connectionCost < connectionCost:
+			self.observer.costImproved(self.count, self.getConnectionpath()[1])
+		return newNode
+
+	def bridgeFree(self, node_from_start, node_from_goal):
+		"""
+		return True if the edge between node of RRT* from start and
+		node of RRT* from goal is free
+		"""
+		return not self.obstacleSet.edgeCollide(self.RRT_from_start.tree.getPos(node_from_start),
+												self.RRT_from_goal.tree.getPos(node_from_goal))
+
+	def bridgeCost(self, node_from_start, node_from_goal):
+		"""
+		return the cost of the path from start to goal through the edge
+		between node of RRT* from start and node of RRT* from goal
+		"""
+		return (self.RRT_from_start.tree.cost[node_from_start] + self.RRT_from_goal.tree.cost[node_from_goal] +
+				self.dist(self.RRT_from_start.tree.getPos(node_from_start), self.RRT_from_goal.tree.getPos(node_from_goal)))
+
+	def pathFree(self, path):
+		"""
+		return True if no edge of path intersects an obstacle
+		"""
+		return not self.obstacleSet.segmentsCollide(path[:-1], path[1:]).any()
+
+	def getConnectionpath(self):
+		"""
+		return the path through the best connection and its cost
+		"""
+		path = self.getPath(self.connection[0], self.connection[1])
+		return path, float(self.connectionCost)
+
+	def addObstacle(self, obs):
+		"""
+		add obstacle obs while planning, only the subtrees below the
+		edges it blocks are removed from both trees
+		"""
+		self.obstacleSet.obstacles.append(obs)
+		self.obstacleSet.changed()
+		self.update([obs])
+
+	def removeObstacle(self, obs):
+		"""
+		remove obstacle obs while planning, both trees stay valid
+		"""
+		self.obstacleSet.obstacles.remove(obs)
+		self.obstacleSet.changed()
+		self.update([])
+
+	def moveObstacle(self, obs, dx, dy):
+		"""
+		move obstacle obs by dx, dy while planning, only the subtrees
+		below the edges blocked at its new position are removed
+		"""
+		obs.move(dx, dy)
+		self.obstacleSet.changed()
+		self.update([obs])
+
+	def update(self, obstacles):
+		"""
+		update both trees after the shared obstacle set changed, the
+		nodes are renumbered so the best connection is searched again
+		"""
+		self.RRT_from_start.update(obstacles)
+		self.RRT_from_goal.update(obstacles)
+
+		self.connection = self.getBestnodes()
+		self.connectionCost = float('inf')
+		if self.connection[0] != None:
+			self.connectionCost = self.bridgeCost(*self.connection)
+
+	def replan(self):
+		"""
+		continue the search on the remaining trees after the obstacles
+		changed, return the path and the trees like plan. The path
+		through the kept connection is only returned if every edge of
+		it is still free
+		"""
+		if not self.iter_limit and self.connection[0] != None:
+			path = self.getPath(self.connection[0], self.connection[1])
+			if self.pathFree(path):
+				self.observer.pathFound(path)
+				return path, [self.RRT_from_start.tree, self.RRT_from_goal.tree]
+
+		return self.plan()
+
+	def cancel(self):
+		"""
+		stop a running anytime search after the current iteration,
+		can be called from another thread
+		"""
+		self.cancelled = True
+
+	def anytime(self, budget):
+		"""
+		Anytime search for budget seconds of wall clock time, both trees
+		grow in turn. This is a generator which yields (path, cost)
+		every time the best connection between the trees gets cheaper.
+		It stops when the budget is over, after MAX_ITER iterations or
+		when cancel is called
+		"""
+		deadline = time.time() + budget
+		self.count = 0
+		self.cancelled = False
+
+		while not self.cancelled and self.count < self.MAX_ITER and time.time() < deadline:
+			self.count += 1
+			connectionCost = self.connectionCost
+			self.grow(self.count%2 == 1)
+
+			if self.connectionCost < connectionCost:
+				if self.goalCount == None:
+					self.goalCount = self.count
+					self.observer.goalReached(self.count)
+				yield self.getConnectionpath()
+
+			self.observer.iteration(self.count)
+
+		if self.connection[0] != None:
+			self.observer.pathFound(self.getConnectionpath()[0])
+
+	def plan(self):
+		"""
+		Search the path without touching the pygame screen, every
+		drawing is left to the observer. Return the path from start
+		to goal as list of positions (None if not found) and the
+		list of both trees
+		"""
+		if self.parallel:
+			return self.planParallel()
+
+		self.count = 0
+
+		trees = [self.RRT_from_start.tree, self.RRT_from_goal.tree]
+		success_to_start = False
+		success_to_goal = False
+
+		while True:
+			self.count += 1
+
+			if self.count < self.MAX_ITER:
+				if self.count%2:
+					newNode_from_start = self.grow(True)
+					pos_from_start = trees[0].getPos(newNode_from_start)
+					success_to_goal, nearestPoint_in_goal = self.RRT_from_goal.getNearestpoint(pos_from_start)
+				else:
+					newNode_from_goal = self.grow(False)
+					pos_from_goal = trees[1].getPos(newNode_from_goal)
+					success_to_start, nearestPoint_in_start = self.RRT_from_start.getNearestpoint(pos_from_goal)
+
+				connection = None
+				if (success_to_goal and self.dist(pos_from_start, trees[1].getPos(nearestPoint_in_goal)) <= delta and
+						self.bridgeFree(newNode_from_start, nearestPoint_in_goal)):
+					connection = newNode_from_start, nearestPoint_in_goal
+
+				elif (success_to_start and self.dist(trees[0].getPos(nearestPoint_in_start), pos_from_goal) <= delta and
+						self.bridgeFree(nearestPoint_in_start, newNode_from_goal)):
+					connection = nearestPoint_in_start, newNode_from_goal
+
+				if connection != None and self.goalCount == None:
+					self.goalCount = self.count
+					self.observer.goalReached(self.count)
+
+				if connection != None and not self.iter_limit:
+					path = self.getPath(connection[0], connection[1])
+					break
+
+			elif self.iter_limit:
+				best_from_start, best_from_goal = self.connection
+				if best_from_start == None or best_from_goal == None:
+					return None, trees
+
+				path = self.getPath(best_from_start, best_from_goal)
+				break
+
+			else:
+				return None, trees
+
+			self.observer.iteration(self.count)
+
+		self.observer.pathFound(path)
+		return path, trees
+
+	def planParallel(self):
+		"""
+		plan with both trees grown at the same time by worker processes,
+		each tree gets half of the iterations. Return the path and the
+		list of both trees like plan
+		"""
+		capacity = self.MAX_ITER//2 + 2
+		buffers = [makeBuffers(capacity), makeBuffers(capacity)]
+		views = [bufferViews(b) for b in buffers]
+		stop = multiprocessing.RawValue('b', 0)
+		published = multiprocessing.Event()
+		seed = random.randint(0, 2**31 - 2)
+		kwargs = {'index': self.RRT_from_start.indexKind, 'sample': self.sample, 'check': self.RRT_from_start.check,
+				'batch': self.RRT_from_start.batch}
+
+		workers = []
+		for i, (start, goal) in enumerate(((self.start, self.goal), (self.goal, self.start))):
+			workers.append(multiprocessing.Process(target = growTree, args = (start, goal, self.obstacleSet, kwargs,
+									seed + i, capacity - 2, buffers[i], stop, published)))
+		for w in workers:
+			w.daemon = True
+			w.start()
+
+		self.count = 0
+		seen = [0, 0]
+		connection = None
+		try:
+			while True:
+				# cleared before the sizes are read, so a node published meanwhile sets it again
+				published.clear()
+				running = any(w.is_alive() for w in workers)
+				sizes = [b['size'].value for b in buffers]
+				if sizes != seen:
+					found = self.checkParallel(views, seen, sizes)
+					connection = connection or found
+					seen = sizes
+					self.count = sizes[0] + sizes[1] - 2
+					self.observer.iteration(self.count)
+					if connection != None and self.goalCount == None:
+						self.goalCount = self.count
+						self.observer.goalReached(self.count)
+					if connection != None and not self.iter_limit:
+						break
+
+				elif not running:
+					break
+				else:
+					published.wait(WAIT_TIMEOUT)
+		finally:
+			stop.value = 1
+			for w in workers:
+				w.join()
+
+		sizes = [b['size'].value for b in buffers]
+		for planner, (pos, parent, cost), n in zip((self.RRT_from_start, self.RRT_from_goal), views, sizes):
+			planner.setTree(Tree.fromArrays(pos[:n].copy(), parent[:n].copy(), cost[:n].copy()))
+		trees = [self.RRT_from_start.tree, self.RRT_from_goal.tree]
+
+		if self.iter_limit:
+			connection = self.getBestnodes()
+			if connection[0] == None:
+				return None, trees
+			self.connection = connection
+			self.connectionCost = self.bridgeCost(*connection)
+
+		elif connection == None:
+			return None, trees
+
+		path = self.getPath(connection[0], connection[1])
+		self.observer.pathFound(path)
+		return path, trees
+
+	def checkParallel(self, views, seen, sizes):
+		"""
+		draw the nodes published by the workers since the seen sizes and
+		check them for a free edge of at most delta to the other tree.
+		Return the cheapest (node from start, node from goal) found,
+		None if there is none
+		"""
+		for (pos, parent, cost), old, n in zip(views, seen, sizes):
+			for i in range(max(old, 1), n):
+				self.observer.addEdge(tuple(pos[parent[i]].tolist()), tuple(pos[i].tolist()))
+
+		(startPos, startParent, startCost), (goalPos, goalParent, goalCost) = views
+		# new nodes from start against all nodes from goal, new nodes from goal against the old ones from start
+		pairs = []
+		for s0, s1, g0, g1 in ((seen[0], sizes[0], 0, sizes[1]), (0, seen[0], seen[1], sizes[1])):
+			if s1 <= s0 or g1 <= g0:
+				continue
+			d = np.hypot(startPos[s0:s1, 0:1] - goalPos[g0:g1, 0], startPos[s0:s1, 1:2] - goalPos[g0:g1, 1])
+			s, g = np.nonzero(d <= delta)
+			pairs.append((s + s0, g + g0))
+
+		if not pairs:
+			return None
+		s = np.concatenate([p[0] for p in pairs])
+		g = np.concatenate([p[1] for p in pairs])
+		if len(s) == 0:
+			return None
+
+		free = ~self.obstacleSet.segmentsCollide(startPos[s], goalPos[g])
+		if not free.any():
+			return None
+		s, g = s[free], g[free]
+		best = np.argmin(startCost[s] + goalCost[g] + np.hypot(*(startPos[s] - goalPos[g]).T))
+		return int(s[best]), int(g[best])
 
 	def run(self):
 		"""
@@ -103,64 +495,9 @@ class BIRRTStar():
 			and RRT* from goal
 			return path
 		"""
-		self.currentState = 'solving'
-		self.count = 0
-
-		success_to_start = False
-		success_to_goal = False
-
-		while True:
-
-			envr.screenUpdate()
-
-			if self.currentState == 'solving':
-				self.count += 1
-
-				if self.count < MAX_ITER:
-					if self.count%2:
-						newNode_from_start = self.RRT_from_start.getNext()
-						self.RRT_from_start.nodes.append(newNode_from_start)
-						envr.drawPath(newNode_from_start.parent.pos, newNode_from_start.pos, envr.cyan)
-						success_to_goal, nearestPoint_in_goal = self.RRT_from_goal.getNearestpoint(newNode_from_start.pos)
-					else:
-						newNode_from_goal = self.RRT_from_goal.getNext()
-						self.RRT_from_goal.nodes.append(newNode_from_goal)
-						envr.drawPath(newNode_from_goal.parent.pos, newNode_from_goal.pos, envr.cyan)
-						success_to_start, nearestPoint_in_start = self.RRT_from_start.getNearestpoint(newNode_from_goal.pos)
-
-					if not self.iter_limit:
-
-						if success_to_goal and self.dist(newNode_from_start.pos, nearestPoint_in_goal.pos) <= delta:
-							self.currentState = 'solved'
-							self.path = self.getPath(newNode_from_start, nearestPoint_in_goal)
-	
-						elif success_to_start and self.dist(nearestPoint_in_start.pos, newNode_from_goal.pos) <= delta:
-							self.currentState = 'solved'
-							self.path = self.getPath(nearestPoint_in_start, newNode_from_goal)
-				
-				elif self.iter_limit:
-					best_from_start, best_from_goal = self.getBestnodes()
-					if best_from_start == None or best_from_goal == None:
-						print("Maximum Number of Iteration Reached")
-						return
-
-					self.currentState = 'solved'
-					self.path = self.getPath(best_from_start, best_from_goal)
-
-				else:
-					print("Maximum Number of Iteration Reached")
-					return
-
-			elif self.currentState == 'solved':
-				currNode = self.RRT_from_goal.start
-
-				while currNode.parent != None:
-					envr.drawPath(currNode.pos,currNode.parent.pos, envr.red, 6)
-					currNode = currNode.parent
-
-				pygame.display.set_caption('Found the path')
-
-			for e in pygame.event.get():
-				if e.type == pygame.QUIT or (e.type == pygame.KEYUP and e.key == pygame.K_ESCAPE):
-					sys.exit("Initiated Exit")
+		path, trees = self.plan()
+		if path == None:
+			print("Maximum Number of Iteration Reached")
+			return
 
+		self.observer.wait()
@@ -0,0 +1,585 @@
+"""
+Author - Rajnish Tiwari
+
+Collision checking against the obstacles of envr. ObstacleSet packs
+the rectangles, lines and circles into numpy arrays so a whole batch
+of points is checked against every obstacle in one vectorized call
+instead of calling isCollide of each obstacle for each point.
+Edges are checked in closed form, segment against the slabs of each
+rectangle and against the closest point to each circle centre, so
+the cost of an edge does not depend on its length and thin obstacles
+can not be stepped over. Results of single edge checks are kept in
+a bounded cache shared by all planners using the same ObstacleSet.
+Maps with many obstacles get a SpatialHash as broad phase, so a
+point or edge is only checked against the obstacles near it. It is
+used for large batches only, for a few queries the fixed cost of the
+hash is higher than checking every obstacle.
+"""
+
+import math
+from collections import OrderedDict
+import numpy as np
+import envr
+import spatial
+
+SEGMENT_STEP = 1.0 # spacing of points checked on an edge for obstacles of other types
+EDGE_CACHE_SIZE = 4096 # number of edge results kept by EdgeCache
+BROAD_PHASE_MIN = 64 # number of obstacles from which the spatial hash is built
+BROAD_PHASE_POINTS = 16384 # (point, obstacle) pairs of a query from which the spatial hash is used
+BROAD_PHASE_SEGMENTS = 4096 # (segment, obstacle) pairs of a query from which the spatial hash is used
+HASH_CELL_FACTOR = 2.0 # cell size of the spatial hash relative to the mean spacing of the obstacles
+HASH_MAX_CELLS = 1 << 16 # number of cells of the spatial hash at most
+
+
+def edgeKey(pos1, pos2):
+	"""
+	key of the edge between the nodes at pos1 and pos2, the same for
+	both directions
+	"""
+	return (pos1, pos2) if pos1 <= pos2 else (pos2, pos1)
+
+
+class EdgeCache():
+	"""
+	Results of edge checks evicted in least recently used order. An
+	edge is identified by the positions of its end nodes instead of
+	node indexes, so results stay valid when a tree renumbers its nodes
+	and are shared between the trees of all planners
+	"""
+	def __init__(self, size = EDGE_CACHE_SIZE):
+		self.size = size
+		self.items = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self):
+		return len(self.items)
+
+	def get(self, key):
+		"""
+		return the stored result of edge key, None if it is unknown
+		"""
+		result = self.items.pop(key, None)
+		if result == None:
+			self.misses += 1
+			return None
+
+		self.items[key] = result
+		self.hits += 1
+		return result
+
+	def put(self, key, result):
+		self.items[key] = result
+		if len(self.items) > self.size:
+			self.items.popitem(last = False)
+			self.evictions += 1
+
+	def clear(self):
+		self.items.clear()
+
+	def stats(self):
+		"""
+		return dict of the hit, miss and eviction counts
+		"""
+		lookups = self.hits + self.misses
+		return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+				'size': len(self.items), 'hit rate': self.hits/float(lookups) if lookups else 0.0}
+
+
+def slab(o, d, lo, hi):
+	"""
+	return the interval of t for which o + t*d lies strictly
+	between lo and hi, for each segment (rows) and slab (columns)
+	"""
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		t0 = (lo - o)/d
+		t1 = (hi - o)/d
+	tmin = np.minimum(t0, t1)
+	tmax = np.maximum(t0, t1)
+
+	# segment parallel to the slab is either always or never inside
+	inside = (o > lo) & (o < hi)
+	parallel = (d == 0)
+	tmin = np.where(parallel, np.where(inside, -np.inf, np.inf), tmin)
+	tmax = np.where(parallel, np.where(inside, np.inf, -np.inf), tmax)
+	return tmin, tmax
+
+
+# The tests below work elementwise, points or segments given as (N,1)
+# columns against (M,k) shapes give (N,M) results while (N,) columns
+# against (N,k) shapes test pairs.
+
+def pointsInRects(x, y, r):
+	"""
+	True where point x, y lies inside rectangle r
+	"""
+	return (x > r[..., 0]) & (x < r[..., 2]) & (y > r[..., 1]) & (y < r[..., 3])
+
+def pointsInCircles(x, y, c):
+	"""
+	True where point x, y lies inside circle c
+	"""
+	return (x - c[..., 0])**2 + (y - c[..., 1])**2 <= c[..., 2]**2
+
+def rayCrossings(x, y, e):
+	"""
+	True where the ray from point x, y to the right crosses polygon
+	edge e, a point is inside a polygon if it crosses an odd number
+	of its edges
+	"""
+	x1, y1, x2, y2 = e[..., 0], e[..., 1], e[..., 2], e[..., 3]
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		return ((y1 > y) != (y2 > y)) & (x < x1 + (y - y1)*(x2 - x1)/(y2 - y1))
+
+def segmentsInRects(x, y, dx, dy, r):
+	"""
+	True where the segment from x, y along dx, dy intersects rectangle r
+	"""
+	# parameter interval of the segment inside the open slab of each axis
+	lox, hix = slab(x, dx, r[..., 0], r[..., 2])
+	loy, hiy = slab(y, dy, r[..., 1], r[..., 3])
+	lo = np.maximum(lox, loy)
+	hi = np.minimum(hix, hiy)
+	return (lo < hi) & (lo < 1) & (hi > 0)
+
+def segmentsInCircles(x, y, dx, dy, c):
+	"""
+	True where the segment from x, y along dx, dy intersects circle c
+	"""
+	dd = dx**2 + dy**2
+	cx = c[..., 0] - x
+	cy = c[..., 1] - y
+	# parameter of the point of the segment closest to each centre
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		t = np.where(dd > 0, (cx*dx + cy*dy)/dd, 0.0)
+	t = np.clip(t, 0.0, 1.0)
+	return (cx - t*dx)**2 + (cy - t*dy)**2 <= c[..., 2]**2
+
+def pointsNearLines(x, y, l):
+	"""
+	True where point x, y lies within half width l[..., 4] of the
+	segment of line l
+	"""
+	ex = l[..., 2] - l[..., 0]
+	ey = l[..., 3] - l[..., 1]
+	ee = ex**2 + ey**2
+	px = x - l[..., 0]
+	py = y - l[..., 1]
+	# parameter of the point of the line closest to the point
+	with np.errstate(divide = 'ignore', invalid = 'ignore'):
+		t = np.where(ee > 0, (px*ex + py*ey)/ee, 0.0)
+	t = np.clip(t, 0.0, 1.0)
+	return (px - t*ex)**2 + (py - t*ey)**2 <= l[..., 4]**2
+
+def segmentsNearLines(x, y, dx, dy, l):
+	"""
+	True where the segment from x, y along dx, dy comes within half
+	width of line l, two segments are that close if they cross or an
+	end of one is that close to the other
+	"""
+	hit = segmentsCrossEdges(x, y, dx, dy, l)
+	hit |= pointsNearLines(x, y, l) | pointsNearLines(x + dx, y + dy, l)
+	hit |= segmentsInCircles(x, y, dx, dy, l[..., [0, 1, 4]]) | segmentsInCircles(x, y, dx, dy, l[..., [2, 3, 4]])
+	return hit
+
+def segmentsCrossEdges(x, y, dx, dy, e):
+	"""
+	True where the segment from x, y along dx, dy crosses or touches
+	polygon edge e
+	"""
+	ex = e[..., 2] - e[..., 0]
+	ey = e[..., 3] - e[..., 1]
+	ax = e[..., 0] - x
+	ay = e[..., 1] - y
+
+	# side of the edge ends to the segment and of the segment ends to the edge
+	o1 = dx*ay - dy*ax
+	o2 = o1 + dx*ey - dy*ex
+	o3 = ey*ax - ex*ay
+	o4 = o3 + ex*dy - ey*dx
+	cross = (o1*o2 <= 0) & (o3*o4 <= 0) & ((dx != 0) | (dy != 0))
+
+	# collinear segment and edge only meet where their boxes overlap
+	collinear = (o1 == 0) & (o2 == 0)
+	if collinear.any():
+		overlap = ((np.minimum(0, dx) <= np.maximum(ax, ax + ex)) & (np.maximum(0, dx) >= np.minimum(ax, ax + ex)) &
+				(np.minimum(0, dy) <= np.maximum(ay, ay + ey)) & (np.maximum(0, dy) >= np.minimum(ay, ay + ey)))
+		cross &= ~collinear | overlap
+	return cross
+
+
+class Shapes():
+	"""
+	Packed arrays of the obstacles
+	rects     - (x min, y min, x max, y max) of rectangle obstacles
+	circles   - (x centre, y centre, radius) of circle obstacles
+	lines     - (x1, y1, x2, y2, half width) of line obstacles
+	edges     - (x1, y1, x2, y2) of the edges of all polygon obstacles
+	polyStart - index of the first edge of every polygon
+	Every point or segment is checked against every obstacle.
+	"""
+	def __init__(self, rects, circles, lines, edges, polyStart):
+		self.rects = rects
+		self.circles = circles
+		self.lines = lines
+		self.edges = edges
+		self.polyStart = polyStart
+
+	def pointsHit(self, points):
+		"""
+		return boolean array which is True for every point of the
+		(N,2) array points which lies inside any of the shapes
+		"""
+		x = points[:, 0:1]
+		y = points[:, 1:2]
+		hit = np.zeros(len(points), dtype = bool)
+
+		if len(self.rects):
+			hit |= pointsInRects(x, y, self.rects).any(axis = 1)
+		if len(self.circles):
+			hit |= pointsInCircles(x, y, self.circles).any(axis = 1)
+		if len(self.lines):
+			hit |= pointsNearLines(x, y, self.lines).any(axis = 1)
+		if len(self.polyStart):
+			hit |= np.logical_xor.reduceat(rayCrossings(x, y, self.edges), self.polyStart, axis = 1).any(axis = 1)
+
+		return hit
+
+	def segmentsHit(self, p1, p2):
+		"""
+		return boolean array which is True for every segment from p1[i]
+		to p2[i] which intersects any of the shapes
+		"""
+		d = p2 - p1
+		x, y = p1[:, 0:1], p1[:, 1:2]
+		dx, dy = d[:, 0:1], d[:, 1:2]
+		hit = np.zeros(len(p1), dtype = bool)
+
+		if len(self.rects):
+			hit |= segmentsInRects(x, y, dx, dy, self.rects).any(axis = 1)
+		if len(self.circles):
+			hit |= segmentsInCircles(x, y, dx, dy, self.circles).any(axis = 1)
+		if len(self.lines):
+			hit |= segmentsNearLines(x, y, dx, dy, self.lines).any(axis = 1)
+		if len(self.polyStart):
+			# a segment which crosses no edge is inside if its start is
+			hit |= segmentsCrossEdges(x, y, dx, dy, self.edges).any(axis = 1)
+			hit |= np.logical_xor.reduceat(rayCrossings(x, y, self.edges), self.polyStart, axis = 1).any(axis = 1)
+
+		return hit
+
+
+class SpatialHash(Shapes):
+	"""
+	Shapes with a broad phase for many obstacles. The box around the
+	obstacles is divided in square cells and every cell keeps the
+	obstacles whose bounding box touches it. A point is only checked
+	against the obstacles of its cell and a segment against those of
+	the cells under its bounding box, all (query, obstacle) pairs of a
+	batch are checked in one vectorized step.
+	"""
+	def __init__(self, shapes, boxes, bounds):
+		"""
+		boxes are the (x min, y min, x max, y max) arrays of the
+		rectangles, circles, polygons and lines of shapes, bounds the
+		box around all of them
+		"""
+		Shapes.__init__(self, shapes.rects, shapes.circles, shapes.lines, shapes.edges, shapes.polyStart)
+		self.polyLength = np.diff(np.append(self.polyStart, len(self.edges)))
+		self.edgeIndex = np.arange(len(self.edges))
+
+		self.x0, self.y0, x1, y1 = bounds
+		count = sum(len(b) for b in boxes)
+		self.cellSize = HASH_CELL_FACTOR*math.sqrt(max((x1 - self.x0)*(y1 - self.y0), 1.0)/count)
+		while (int((x1 - self.x0)/self.cellSize) + 1)*(int((y1 - self.y0)/self.cellSize) + 1) > HASH_MAX_CELLS:
+			self.cellSize *= 2
+		self.nx = int((x1 - self.x0)/self.cellSize) + 1
+		self.ny = int((y1 - self.y0)/self.cellSize) + 1
+
+		# start, count and obstacles of every cell for each type
+		self.cells = []
+		for box in boxes:
+			owner, keys = spatial.coveredCells(*self.cellRange(box[:, :2], box[:, 2:]) + (self.ny,))
+			count = np.bincount(keys, minlength = self.nx*self.ny)
+			self.cells.append((np.cumsum(count) - count, count, owner[np.argsort(keys, kind = 'stable')]))
+
+	def cellRange(self, lo, hi):
+		"""
+		return the first and last cell column and row touched by the
+		boxes from lo to hi, clipped to the grid, empty ranges have
+		first > last
+		"""
+		ix0 = np.maximum(np.floor((lo[:, 0] - self.x0)/self.cellSize), 0).astype(np.intp)
+		iy0 = np.maximum(np.floor((lo[:, 1] - self.y0)/self.cellSize), 0).astype(np.intp)
+		ix1 = np.minimum(np.floor((hi[:, 0] - self.x0)/self.cellSize), self.nx - 1).astype(np.intp)
+		iy1 = np.minimum(np.floor((hi[:, 1] - self.y0)/self.cellSize), self.ny - 1).astype(np.intp)
+		return ix0, iy0, ix1, iy1
+
+	def candidates(self, kind, owner, keys, unique = False):
+		"""
+		return (query, obstacle) of every obstacle of kind (0 rectangles,
+		1 circles, 2 polygons, 3 lines) in cell keys[i] of query owner[i]. A query
+		touching many cells can get the same obstacle more than once
+		unless unique is set
+		"""
+		start, count, items = self.cells[kind]
+		ranges, index = spatial.gatherRanges(items, start[keys], count[keys], 1)
+		query = owner[ranges]
+		if unique and len(index):
+			n = max(len(self.rects), len(self.circles), len(self.polyStart), len(self.lines))
+			pairs = np.unique(query*n + index)
+			query, index = pairs//n, pairs % n
+		return query, index
+
+	def polygonEdges(self, polygons):
+		"""
+		return (pair, edge) of every edge of polygons[pair] and the
+		index of the first row of each pair
+		"""
+		lengths = self.polyLength[polygons]
+		pair, edge = spatial.gatherRanges(self.edgeIndex, self.polyStart[polygons], lengths, 1)
+		return pair, edge, np.cumsum(lengths) - lengths
+
+	def pointsHit(self, points):
+		"""
+		same as Shapes.pointsHit, but only the obstacles in the cell of
+		each point are checked
+		"""
+		ix0, iy0, ix1, iy1 = self.cellRange(points, points)
+		owner = np.flatnonzero((ix0 <= ix1) & (iy0 <= iy1))
+		keys = ix0[owner]*self.ny + iy0[owner]
+		x, y = points[:, 0], points[:, 1]
+		hit = np.zeros(len(points), dtype = bool)
+
+		q, i = self.candidates(0, owner, keys)
+		hit[q[pointsInRects(x[q], y[q], self.rects[i])]] = True
+		q, i = self.candidates(1, owner, keys)
+		hit[q[pointsInCircles(x[q], y[q], self.circles[i])]] = True
+		q, i = self.candidates(3, owner, keys)
+		hit[q[pointsNearLines(x[q], y[q], self.lines[i])]] = True
+		q, i = self.candidates(2, owner, keys)
+		if len(i):
+			pair, edge, first = self.polygonEdges(i)
+			crossings = rayCrossings(x[q[pair]], y[q[pair]], self.edges[edge])
+			hit[q[np.logical_xor.reduceat(crossings, first)]] = True
+
+		return hit
+
+	def segmentsHit(self, p1, p2):
+		"""
+		same as Shapes.segmentsHit, but only the obstacles in the cells
+		under the bounding box of each segment are checked
+		"""
+		owner, keys = spatial.coveredCells(*self.cellRange(np.minimum(p1, p2), np.maximum(p1, p2)) + (self.ny,))
+		d = p2 - p1
+		x, y, dx, dy = p1[:, 0], p1[:, 1], d[:, 0], d[:, 1]
+		hit = np.zeros(len(p1), dtype = bool)
+
+		q, i = self.candidates(0, owner, keys, True)
+		hit[q[segmentsInRects(x[q], y[q], dx[q], dy[q], self.rects[i])]] = True
+		q, i = self.candidates(1, owner, keys, True)
+		hit[q[segmentsInCircles(x[q], y[q], dx[q], dy[q], self.circles[i])]] = True
+		q, i = self.candidates(3, owner, keys, True)
+		hit[q[segmentsNearLines(x[q], y[q], dx[q], dy[q], self.lines[i])]] = True
+		q, i = self.candidates(2, owner, keys, True)
+		if len(i):
+			pair, edge, first = self.polygonEdges(i)
+			q = q[pair]
+			e = self.edges[edge]
+			hit[q[segmentsCrossEdges(x[q], y[q], dx[q], dy[q], e)]] = True
+			# a segment which crosses no edge is inside if its start is
+			hit[q[first][np.logical_xor.reduceat(rayCrossings(x[q], y[q], e), first)]] = True
+
+		return hit
+
+
+class ObstacleSet():
+	"""
+	Set of obstacles stored as packed arrays
+	rects    - (x min, y min, x max, y max) of rectangle obstacles
+	circles  - (x centre, y centre, radius) of circle obstacles
+	lines    - (x1, y1, x2, y2, half width) of line obstacles, a line
+	           blocks every point within half its width of the segment
+	polygons - (x min, y min, x max, y max) of the boxes around polygon
+	           obstacles, their edges are kept in shapes
+	Obstacles of any other type are checked by their own isCollide.
+	shapes checks the packed obstacles against every query, with at
+	least BROAD_PHASE_MIN of them hash is a SpatialHash of the same
+	obstacles. The hash costs a fixed 50 to 100 microseconds per call
+	so it is only used for queries which would test more (query,
+	obstacle) pairs than BROAD_PHASE_POINTS or BROAD_PHASE_SEGMENTS.
+	"""
+	def __init__(self, obstacles):
+		self.obstacles = list(obstacles)
+		self.freeSpace = None # free space raster built by sampler.getFreeSpace
+		self.roadmap = None # roadmap built by prm.getRoadmap
+		self.edgeCache = EdgeCache()
+		self.segmentChecks = 0 # number of segments checked by segmentsCollide
+		self.pack()
+
+	def changed(self):
+		"""
+		pack the arrays again after the list of obstacles was changed,
+		cached edge results, the free space raster and the roadmap are
+		dropped
+		"""
+		self.pack()
+		self.edgeCache.clear()
+		self.freeSpace = None
+		self.roadmap = None
+
+	def pack(self):
+		"""
+		build the packed arrays and the spatial hash from the list of
+		obstacles
+		"""
+		rects = []
+		circles = []
+		lines = []
+		edges = []
+		polyStart = []
+		polygons = []
+		self.others = []
+		for obs in self.obstacles:
+			if isinstance(obs, envr.rectangle):
+				rects.append((obs.x, obs.y, obs.x + obs.width, obs.y + obs.height))
+			elif isinstance(obs, envr.line):
+				lines.append((obs.pointi[0], obs.pointi[1], obs.pointg[0], obs.pointg[1], obs.width/2.0))
+			elif isinstance(obs, envr.circle):
+				circles.append((obs.x, obs.y, obs.r))
+			elif isinstance(obs, envr.polygon):
+				points = obs.points
+				polyStart.append(len(edges))
+				edges.extend(points[i] + points[(i + 1) % len(points)] for i in range(len(points)))
+				xs = [p[0] for p in points]
+				ys = [p[1] for p in points]
+				polygons.append((min(xs), min(ys), max(xs), max(ys)))
+			else:
+				self.others.append(obs)
+
+		self.rects = np.array(rects, dtype = np.float64).reshape(-1, 4)
+		self.circles = np.array(circles, dtype = np.float64).reshape(-1, 3)
+		self.polygons = np.array(polygons, dtype = np.float64).reshape(-1, 4)
+		self.lines = np.array(lines, dtype = np.float64).reshape(-1, 5)
+		self.shapes = Shapes(self.rects, self.circles, self.lines, np.array(edges, dtype = np.float64).reshape(-1, 4),
+							np.array(polyStart, dtype = np.intp))
+
+		self.count = len(self.rects) + len(self.circles) + len(self.polygons) + len(self.lines)
+		self.hash = None
+		if self.count >= BROAD_PHASE_MIN:
+			self.hash = SpatialHash(self.shapes, self.boxes(), self.packedBounds())
+
+	def boxes(self):
+		"""
+		return the (x min, y min, x max, y max) arrays of the boxes
+		around the rectangles, circles, polygons and lines
+		"""
+		circles = self.circles
+		lines = self.lines
+		return (self.rects, np.column_stack((circles[:, :2] - circles[:, 2:], circles[:, :2] + circles[:, 2:])),
+				self.polygons, np.column_stack((np.minimum(lines[:, :2], lines[:, 2:4]) - lines[:, 4:],
+												np.maximum(lines[:, :2], lines[:, 2:4]) + lines[:, 4:])))
+
+	def pick(self, n, pairs):
+		"""
+		return the spatial hash if a query of n points or segments
+		checked against every packed obstacle makes at least pairs
+		(query, obstacle) pairs, otherwise the plain shapes
+		"""
+		if self.hash != None and n*self.count >= pairs:
+			return self.hash
+		return self.shapes
+
+	def packedBounds(self):
+		"""
+		return (x min, y min, x max, y max) of the box around all
+		packed obstacles, None if there is none
+		"""
+		boxes = np.vstack(self.boxes())
+		if len(boxes) == 0:
+			return None
+		return tuple(boxes[:, :2].min(axis = 0).tolist() + boxes[:, 2:].max(axis = 0).tolist())
+
+	def bounds(self):
+		"""
+		return (x min, y min, x max, y max) of the box around all
+		obstacles, the whole window if an obstacle has other type
+		"""
+		if len(self.others):
+			return 0.0, 0.0, float(envr.XDIM), float(envr.YDIM)
+		return self.packedBounds()
+
+	def collides(self, points):
+		"""
+		return boolean array which is True for every point of the
+		(N,2) array points which lies inside any obstacle
+		"""
+		points = np.asarray(points, dtype = np.float64).reshape(-1, 2)
+		hit = self.pick(len(points), BROAD_PHASE_POINTS).pointsHit(points)
+
+		for obs in self.others:
+			for i in np.flatnonzero(~hit):
+				hit[i] = obs.isCollide(points[i])
+
+		return hit
+
+	def collide(self, pos):
+		"""
+		return True if given position lies inside any obstacle
+		"""
+		return bool(self.collides(pos)[0])
+
+	def segmentsCollide(self, p1, p2):
+		"""
+		return boolean array which is True for every segment from p1[i]
+		to p2[i] which intersects any obstacle, either p1 or p2 can be a
+		single point shared by all segments
+		"""
+		p1 = np.asarray(p1, dtype = np.float64).reshape(-1, 2)
+		p2 = np.asarray(p2, dtype = np.float64).reshape(-1, 2)
+		p1, p2 = np.broadcast_arrays(p1, p2)
+		self.segmentChecks += len(p1)
+		hit = self.pick(len(p1), BROAD_PHASE_SEGMENTS).segmentsHit(p1, p2)
+
+		d = p2 - p1
+		for obs in self.others:
+			for i in np.flatnonzero(~hit):
+				n = int(math.sqrt((d[i]**2).sum())/SEGMENT_STEP) + 1
+				for k in range(n + 1):
+					if obs.isCollide(p1[i] + d[i]*k/n):
+						hit[i] = True
+						break
+
+		return hit
+
+	def segmentCollide(self, pos1, pos2):
+		"""
+		return True if segment from pos1 to pos2 intersects any obstacle
+		"""
+		return bool(self.segmentsCollide(pos1, pos2)[0])
+
+	def edgeCollide(self, pos1, pos2):
+		"""
+		return True if the edge from pos1 to pos2 intersects any
+		obstacle. Single edges are checked again and again when paths
+		are validated or repaired, so their results are cached. Batches
+		of edges go to segmentsCollide, for them the lookups cost more
+		than they save
+		"""
+		key = edgeKey((float(pos1[0]), float(pos1[1])), (float(pos2[0]), float(pos2[1])))
+		result = self.edgeCache.get(key)
+		if result == None:
+			result = self.segmentCollide(pos1, pos2)
+			self.edgeCache.put(key, result)
+		return result
+
+
+def asObstacleSet(obstacles):
+	"""
+	return obstacles as ObstacleSet, a set which is already packed
+	is returned as it is so it can be shared between planners
+	"""
+	if isinstance(obstacles, ObstacleSet):
+		return obstacles
+	return ObstacleSet(obstacles)
@@ -6,20 +6,28 @@ generate obstacles for motion planning algorithms.
 Size of screen can be changed by changing the XDIM and YDIM
 Start point and goal point radius can be changed by 
 changing the GOAL_RADIUS
+The pygame window is only opened by initScreen so the obstacles
+can be used for headless planning as well.
+Lines drawn by drawPath are only collected as dirty rectangles,
+screenUpdate presents them at most FRAME_RATE times per second so
+drawing the growing tree does not slow the planner down.
 """
 
 
 import math, sys, random, pygame
-pygame.init()
 
 
 XDIM = 950   	# width of pygame screen
 YDIM = 600		# height  of pygame screen
 windowSize = [XDIM, YDIM]
 GOAL_RADIUS = 10 # radius of starting and goal point
+FRAME_RATE = 30 # frames per second presented by screenUpdate
+DIRTY_LIMIT = 256 # dirty rectangles kept before they are merged into one
 
-fpsClock = pygame.time.Clock()
-screen = pygame.display.set_mode(windowSize)
+fpsClock = None
+screen = None
+dirtyRects = [] # areas drawn by drawPath since the last frame
+lastFrame = 0 # time of the last frame in milliseconds
 
 white = 255, 255, 255
 black = 0, 0, 0
@@ -29,6 +37,21 @@ green = 0, 255, 0
 cyan = 0,180,105
 
 
+def initScreen():
+	"""
+	initialize pygame and open the window of size windowSize,
+	only needed when the planning is visualised
+	"""
+	global screen, fpsClock
+
+	if screen == None:
+		pygame.init()
+		fpsClock = pygame.time.Clock()
+		screen = pygame.display.set_mode(windowSize)
+
+	return screen
+
+
 class line():
 	"""
 	this class will be used to include line type obstacles
@@ -46,13 +69,26 @@ class line():
 		"""
 		pygame.draw.line(screen, self.color, self.pointi, self.pointg, self.width)
 
+	def move(self, dx, dy):
+		"""
+		move the obstacle by dx, dy
+		"""
+		self.pointi = self.pointi[0] + dx, self.pointi[1] + dy
+		self.pointg = self.pointg[0] + dx, self.pointg[1] + dy
+
 	def isCollide(self, pos):
 		"""
-		return True if given position lies inside the obstacle
+		return True if given position lies within half the width of
+		the line from pointi to pointg
 		"""
-		if pos[0] > self.pointi[0] and pos[0] < self.pointg[0]:
-			if pos[1] > self.pointi[1] and pos[1] < self.pointg[1]:
-				return True
+		x1, y1 = self.pointi
+		x2, y2 = self.pointg
+		dx, dy = x2 - x1, y2 - y1
+		t = 0.0
+		if dx != 0 or dy != 0:
+			t = min(max(((pos[0] - x1)*dx + (pos[1] - y1)*dy)/float(dx*dx + dy*dy), 0.0), 1.0)
+		if math.hypot(pos[0] - x1 - t*dx, pos[1] - y1 - t*dy) <= self.width/2.0:
+			return True
 
 		return False
 
@@ -75,6 +111,13 @@ class circle():
 		"""
 		pygame.draw.circle(screen, self.color, (self.x, self.y), self.r)
 
+	def move(self, dx, dy):
+		"""
+		move the obstacle by dx, dy
+		"""
+		self.x += dx
+		self.y += dy
+
 	def isCollide(self, pos):
 		"""
 		return True if given position lies inside the obstacle
@@ -102,6 +145,13 @@ class rectangle():
 		"""		
 		pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height), 0)
 
+	def move(self, dx, dy):
+		"""
+		move the obstacle by dx, dy
+		"""
+		self.x += dx
+		self.y += dy
+
 	def isCollide(self, pos):
 		"""
 		return True if given position lies inside the obstacle
@@ -113,6 +163,44 @@ class rectangle():
 		return False
 
 
+class polygon():
+	"""
+	this class will be used to include polygon type obstacles
+	in pygame environment, points are the corners in order
+	"""
+	def __init__(self, color, points):
+		self.color = color
+		self.points = [tuple(p) for p in points]
+
+	def draw(self,outline = None):
+		"""
+		draw the obstacle on screen
+		"""
+		pygame.draw.polygon(screen, self.color, self.points, 0)
+
+	def move(self, dx, dy):
+		"""
+		move the obstacle by dx, dy
+		"""
+		self.points = [(x + dx, y + dy) for x, y in self.points]
+
+	def isCollide(self, pos):
+		"""
+		return True if given position lies inside the obstacle,
+		counting the edges crossed by a ray from pos to the right
+		"""
+		inside = False
+		n = len(self.points)
+		for i in range(n):
+			x1, y1 = self.points[i]
+			x2, y2 = self.points[(i + 1) % n]
+			if (y1 > pos[1]) != (y2 > pos[1]):
+				if pos[0] < x1 + (pos[1] - y1)*(x2 - x1)/float(y2 - y1):
+					inside = not inside
+
+		return inside
+
+
 class button():
 	"""
 	this class create button with given text on pygame screen
@@ -180,7 +268,7 @@ def initialScreen():
 	wait for user to select the button
 	"""
 
-	algo = {1: 'RRT', 2: 'RRT*', 3: 'BI_RRT*'}
+	algo = {1: 'RRT', 2: 'RRT*', 3: 'BI_RRT*', 4: 'PRM*'}
 
 	algoButton = []
 	i = 0
@@ -204,15 +292,19 @@ def initialScreen():
 					
 				for b in algoButton:
 					if b.isOver(e.pos) and b.text == 'RRT':
-						print 'RRT selected'
+						print('RRT selected')
 						return b.text
 
 					elif b.isOver(e.pos) and b.text == 'RRT*':
-						print 'RRT* selected'
+						print('RRT* selected')
 						return b.text
 							
 					elif b.isOver(e.pos) and b.text == 'BI_RRT*':
-						print 'BI_RRT* selected'
+						print('BI_RRT* selected')
+						return b.text
+
+					elif b.isOver(e.pos) and b.text == 'PRM*':
+						print('PRM* selected')
 						return b.text
 
 
@@ -263,11 +355,11 @@ def drawIterlimit():
 					
 				for b in optionButton:
 					if b.isOver(e.pos) and b.text == 'Goal Reach':
-						print 'Termination by goal reach selected'
+						print('Termination by goal reach selected')
 						return False
 
 					elif b.isOver(e.pos) and b.text == 'Iter Limit':
-						print 'Termination by Iteration limit selected'
+						print('Termination by Iteration limit selected')
 						return True
 
 
@@ -335,15 +427,30 @@ def checkObst(pos, obstacles):
 
 def drawPath(pos1, pos2, color, width = 1):
 	"""
-	draw the line between position1 to position2
+	draw the line between position1 to position2, the line is shown
+	by the next frame of screenUpdate
 	"""
-	pygame.draw.line(screen,color,pos1,pos2, width)
+	global dirtyRects
 
-def screenUpdate():
+	rect = pygame.draw.line(screen,color,pos1,pos2, width)
+	dirtyRects.append(rect)
+	if len(dirtyRects) > DIRTY_LIMIT:
+		dirtyRects = [rect.unionall(dirtyRects)]
+
+def screenUpdate(force = False):
 	"""
-	update the screen
+	update the parts of the screen drawn since the last frame, unless
+	the last frame is less than 1/FRAME_RATE seconds old and force is
+	not set. Return True if a frame was presented
 	"""
-	pygame.display.update()
-	fpsClock.tick(10000)
+	global dirtyRects, lastFrame
+
+	now = pygame.time.get_ticks()
+	if not force and now - lastFrame < 1000.0/FRAME_RATE:
+		return False
+
+	pygame.display.update(dirtyRects)
+	dirtyRects = []
+	lastFrame = now
+	return True
 
-	
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Author - Rajnish Tiwari
+
+Growing step shared by RRT and RRT*, both inherit Expansion for the
+search of the node to extend from and for the batch mode.
+
+getNearestpoint takes the nearest node from the index and only when
+the edge of the step from it is blocked asks the index for the next
+nearest nodes in order of distance, so usually one or two edges are
+checked. Both modes check the whole edge, not only its new end.
+
+With batch > 1 random points are drawn in batches, their nearest nodes
+are found, the new nodes steered and their edges checked for obstacles
+in one vectorized step for the whole batch. In the benchmark this makes
+RRT about 1.2 to 1.5 times faster. RRT* gains hardly anything as it
+still chooses the parent and rewires node by node, so batch mode is no
+order of magnitude speed up.
+
+The class using Expansion provides tree, index, obstacleSet, sampler,
+batch, batchPoints, batchSize and the methods dist and steer.
+"""
+
+import numpy as np
+import spatial
+
+delta = 10.0 # search step of RRT and RRT*
+NEAREST_CANDIDATES = 4 # nearest nodes taken from the index at once by getNearestpoint
+
+
+class Expansion():
+	"""
+	Choice of the node to extend the tree from, by single random
+	points or by batches of them
+	"""
+	def getNearestpoint(self, point):
+		"""
+		Return the node in tree nearest to given point from which the
+		edge of the step towards point is free, only nodes which are not
+		farther than the start node are tried. When the step from the
+		nearest node is blocked the next nearest nodes are taken from the
+		index in order of distance, so usually one or two nodes are checked
+		for obstacles. The start node is returned on failure
+		"""
+		nearestPoint = self.index.nearest(point)
+		pos = self.tree.getPos(nearestPoint)
+		if not self.obstacleSet.segmentCollide(pos, self.steer(pos, point)):
+			return True, nearestPoint
+
+		limit = self.dist(self.tree.getPos(0), point)
+		k = NEAREST_CANDIDATES
+		tried = 1
+		while True:
+			candidates = self.index.kNearest(point, k)
+			for nearestPoint in candidates[tried:]:
+				pos = self.tree.getPos(nearestPoint)
+				if self.dist(pos, point) > limit:
+					return False, 0
+				if not self.obstacleSet.segmentCollide(pos, self.steer(pos, point)):
+					return True, nearestPoint
+
+			if len(candidates) < k:
+				return False, 0
+			tried = k
+			k *= 2
+
+	def getBatch(self):
+		"""
+		draw batch random points at once, find their nearest nodes, steer
+		towards them and check the new edges in one vectorized step. The
+		batch is kept in batchPoints as (point, nearest node, new position,
+		edge is free) together with the size of the tree it was made for.
+		A small tree draws at most as many points as it has nodes
+		"""
+		points = self.sampler.sample(min(self.batch, len(self.tree)))
+		positions = self.tree.getPositions()
+		nearest = spatial.nearestMany(positions, points)
+		p1 = positions[nearest]
+		d = points - p1
+		length = np.hypot(d[:, 0], d[:, 1])
+		with np.errstate(divide = 'ignore'):
+			scale = np.where(length < delta, 1.0, delta/length)
+		pos = p1 + d*scale[:, None]
+		free = ~self.obstacleSet.segmentsCollide(p1, pos)
+
+		self.batchSize = len(self.tree)
+		self.batchPoints = list(zip(points.tolist(), nearest.tolist(), pos.tolist(), free.tolist()))
+		self.batchPoints.reverse()
+
+	def getBatchpoint(self):
+		"""
+		return the next new position with a free edge and its nearest
+		node from the batch. Nodes added since the batch was drawn are
+		searched for a nearer node, only then the position is steered
+		and checked again
+		"""
+		while True:
+			while len(self.batchPoints) == 0:
+				self.getBatch()
+
+			point, nearest, pos, free = self.batchPoints.pop()
+			if len(self.tree) > self.batchSize:
+				added = self.tree.pos[self.batchSize:len(self.tree)]
+				d = (added[:, 0] - point[0])**2 + (added[:, 1] - point[1])**2
+				i = int(d.argmin())
+				if d[i] < self.dist(point, self.tree.getPos(nearest))**2:
+					nearest = self.batchSize + i
+					pos = self.steer(self.tree.getPos(nearest), point)
+					free = not self.obstacleSet.segmentCollide(self.tree.getPos(nearest), pos)
+
+			if free:
+				return tuple(pos), nearest
@@ -3,7 +3,7 @@ Topic - Motion Planning
 Author - Rajnish Tiwari
 
 This is main file which will import motion planning algorithms
-like RRT, RRT* and Bi-Directional RRT*
+like RRT, RRT*, Bi-Directional RRT* and PRM*
 This function will first call a screen of all these motion planning
 algorithms then it will create few default obstacles. After this
 it will ask to select starting point and goal point which can 
@@ -13,30 +13,27 @@ be selected by clicking the mouse on screen
 import pygame
 
 import envr
-from rrt import RRT
-from rrt_star import RRTStar
-from birrt_star import BIRRTStar
+import planners
+from observer import ScreenObserver
+
+captions = {'RRT': 'RRT', 'RRT*': 'RRT*', 'BI_RRT*': 'Bi-RRT*', 'PRM*': 'PRM*'}
 
 
 def main():
+	envr.initScreen()
 	s = envr.initialScreen()
 
-	if s != 'RRT':
+	iter_limit = False
+	if s in ('RRT*', 'BI_RRT*'):
 		iter_limit = envr.drawIterlimit()
 
 	obstacles = envr.getObstacle(4)
 	envr.drawObstacles(obstacles)
 	points = envr.getSearchPoints(obstacles)
 
-	if s == 'RRT':
-		planner = RRT(points[0], points[1], obstacles)
-		pygame.display.set_caption('RRT searching for path')
-	elif s == 'RRT*':
-		planner = RRTStar(points[0], points[1], obstacles, iter_limit)
-		pygame.display.set_caption('RRT* searching for path')
-	else:
-		planner = BIRRTStar(points[0], points[1], obstacles, iter_limit)
-		pygame.display.set_caption('Bi-RRT* searching for path')
+	planner = planners.makePlanner(s, points[0], points[1], obstacles, iter_limit,
+								observer = ScreenObserver())
+	pygame.display.set_caption(captions[s] + ' searching for path')
 
 	planner.run()
 
@@ -0,0 +1,93 @@
+"""
+Author - Rajnish Tiwari
+
+Reading and writing obstacle maps as JSON so the same map can be
+used by many planning queries. A map file holds a list of obstacles
+
+	[{"type": "rectangle", "x": 10, "y": 20, "width": 180, "height": 120},
+	 {"type": "circle", "x": 400, "y": 300, "r": 75},
+	 {"type": "line", "pointi": [600, 100], "pointg": [650, 400], "width": 5},
+	 {"type": "polygon", "points": [[700, 50], [800, 80], [760, 160]]}]
+
+or an object with this list stored under "obstacles". A line blocks
+the points within half its width (5 if not given) of its segment. loadSet returns
+the map packed as collision.ObstacleSet, maps with many obstacles get
+its spatial hash so queries only check the obstacles near them.
+"""
+
+import json
+import collision
+import envr
+
+
+def obstacleToDict(obs):
+	"""
+	return the JSON representation of obstacle obs
+	"""
+	if isinstance(obs, envr.rectangle):
+		return {'type': 'rectangle', 'x': obs.x, 'y': obs.y, 'width': obs.width, 'height': obs.height}
+	elif isinstance(obs, envr.circle):
+		return {'type': 'circle', 'x': obs.x, 'y': obs.y, 'r': obs.r}
+	elif isinstance(obs, envr.line):
+		return {'type': 'line', 'pointi': list(obs.pointi), 'pointg': list(obs.pointg), 'width': obs.width}
+	elif isinstance(obs, envr.polygon):
+		return {'type': 'polygon', 'points': [list(p) for p in obs.points]}
+
+	raise ValueError('unknown obstacle type ' + obs.__class__.__name__)
+
+
+def obstacleFromDict(data):
+	"""
+	return the obstacle described by JSON representation data
+	"""
+	color = tuple(data.get('color', envr.black))
+
+	if data['type'] == 'rectangle':
+		return envr.rectangle(color, data['x'], data['y'], data['width'], data['height'])
+	elif data['type'] == 'circle':
+		return envr.circle(color, data['x'], data['y'], data['r'])
+	elif data['type'] == 'line':
+		return envr.line(color, tuple(data['pointi']), tuple(data['pointg']), data.get('width', 5))
+	elif data['type'] == 'polygon':
+		return envr.polygon(color, data['points'])
+
+	raise ValueError('unknown obstacle type ' + str(data['type']))
+
+
+def fromData(data):
+	"""
+	return the list of obstacles of a map loaded from JSON
+	"""
+	if isinstance(data, dict):
+		data = data['obstacles']
+	return [obstacleFromDict(d) for d in data]
+
+
+def toData(obstacles):
+	"""
+	return the JSON representation of list of obstacles
+	"""
+	return [obstacleToDict(obs) for obs in obstacles]
+
+
+def load(path):
+	"""
+	return the list of obstacles stored in map file path
+	"""
+	with open(path) as f:
+		return fromData(json.load(f))
+
+
+def loadSet(path):
+	"""
+	return the obstacles stored in map file path as ObstacleSet
+	"""
+	return collision.ObstacleSet(load(path))
+
+
+def save(path, obstacles):
+	"""
+	store the list of obstacles in map file path
+	"""
+	with open(path, 'w') as f:
+		json.dump({'obstacles': toData(obstacles)}, f, indent = 1)
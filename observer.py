@@ -0,0 +1,130 @@
+"""
+Author - Rajnish Tiwari
+
+Observers which are notified by the motion planning algorithms
+while they are searching for the path. The planners never draw
+by themselves, Observer ignores every event so planning runs
+headless while ScreenObserver draws the tree on the pygame screen.
+"""
+
+import sys, pygame
+import envr
+
+
+class Observer():
+	"""
+	Observer which ignores every event of the planner
+	"""
+	def addEdge(self, pos1, pos2):
+		"""
+		called when an edge from pos1 to pos2 is added to the tree
+		"""
+		pass
+
+	def addEdges(self, positions1, positions2):
+		"""
+		called when many edges are added at once, e.g. the tree of a
+		warm start, positions1 and positions2 are (N,2) arrays of the
+		ends of the edges
+		"""
+		pass
+
+	def rewire(self, oldParentPos, newParentPos, pos):
+		"""
+		called when the parent of node at pos changes from
+		oldParentPos to newParentPos
+		"""
+		pass
+
+	def removeEdge(self, pos1, pos2):
+		"""
+		called when the edge from pos1 to pos2 is removed from the tree
+		"""
+		pass
+
+	def goalReached(self, count):
+		"""
+		called once when the first path to the goal region
+		is found at iteration count
+		"""
+		pass
+
+	def costImproved(self, count, cost):
+		"""
+		called at iteration count every time a cheaper path to the
+		goal is found, cost is the length of the new path
+		"""
+		pass
+
+	def iteration(self, count):
+		"""
+		called at the end of every iteration of the planner
+		"""
+		pass
+
+	def pathFound(self, path):
+		"""
+		called once with the list of positions of the final path
+		"""
+		pass
+
+	def wait(self):
+		"""
+		called by run after the search, keeps the result visible
+		"""
+		pass
+
+
+class ScreenObserver(Observer):
+	"""
+	Observer which draws the tree growing on the pygame screen.
+	Edges are drawn as they come but the screen is only updated
+	at the frame rate of envr.screenUpdate, so the planner is not
+	slowed down by the display. every is the number of iterations
+	between two frames at most.
+	"""
+	def __init__(self, every = 1):
+		envr.initScreen()
+		self.every = every
+
+	def addEdge(self, pos1, pos2):
+		envr.drawPath(pos1, pos2, envr.cyan)
+
+	def addEdges(self, positions1, positions2):
+		for pos1, pos2 in zip(positions1.tolist(), positions2.tolist()):
+			envr.drawPath(pos1, pos2, envr.cyan)
+
+	def rewire(self, oldParentPos, newParentPos, pos):
+		envr.drawPath(oldParentPos, pos, envr.white)
+		envr.drawPath(newParentPos, pos, envr.blue)
+
+	def removeEdge(self, pos1, pos2):
+		envr.drawPath(pos1, pos2, envr.white)
+
+	def iteration(self, count):
+		if count % self.every == 0 and envr.screenUpdate():
+			self.checkExit()
+
+	def pathFound(self, path):
+		for i in range(len(path) - 1):
+			envr.drawPath(path[i], path[i + 1], envr.red, 6)
+		pygame.display.set_caption('Found the path')
+		envr.screenUpdate(True)
+
+	def wait(self):
+		"""
+		nothing is drawn any more, so only the window events are
+		handled at the frame rate
+		"""
+		envr.screenUpdate(True)
+		while True:
+			self.checkExit()
+			envr.fpsClock.tick(envr.FRAME_RATE)
+
+	def checkExit(self):
+		"""
+		exit when the window is closed or escape is pressed
+		"""
+		for e in pygame.event.get():
+			if e.type == pygame.QUIT or (e.type == pygame.KEYUP and e.key == pygame.K_ESCAPE):
+				sys.exit("Initiated Exit")
@@ -0,0 +1,74 @@
+"""
+Author - Rajnish Tiwari
+
+Headless entry point to the motion planning algorithms. A planner is
+selected by the same name which is shown on the selection screen
+(RRT, RRT*, BI_RRT* or PRM*) and the search never opens the pygame window
+unless an observer which draws is given.
+
+	path, tree = planners.plan('RRT*', start, goal, envr.getObstacle(4))
+"""
+
+import math
+
+from rrt import RRT
+from rrt_star import RRTStar
+from birrt_star import BIRRTStar
+from prm import PRMStar
+
+
+PLANNERS = {'RRT': RRT, 'RRT*': RRTStar, 'BI_RRT*': BIRRTStar, 'PRM*': PRMStar}
+
+
+def makePlanner(name, start, goal, obstacles, iter_limit = False, **kwargs):
+	"""
+	create the planner with given name, iter_limit is ignored by RRT
+	which always terminates on reaching the goal and by PRM* which
+	searches its roadmap
+	"""
+	if name in ('RRT', 'PRM*'):
+		return PLANNERS[name](start, goal, obstacles, **kwargs)
+
+	return PLANNERS[name](start, goal, obstacles, iter_limit, **kwargs)
+
+
+def plan(name, start, goal, obstacles, iter_limit = False, **kwargs):
+	"""
+	search the path between start and goal with planner of given name,
+	return the path as list of positions (None if not found) and the
+	tree (list of both trees for BI_RRT*, the roadmap for PRM*)
+	"""
+	planner = makePlanner(name, start, goal, obstacles, iter_limit, **kwargs)
+	return planner.plan()
+
+
+def anytime(name, start, goal, obstacles, budget, **kwargs):
+	"""
+	anytime search with RRT* or BI_RRT* for budget seconds, return
+	the generator of (path, cost) which yields every improved path
+	"""
+	planner = makePlanner(name, start, goal, obstacles, True, **kwargs)
+	return planner.anytime(budget)
+
+
+def pathCost(path):
+	"""
+	return the length of path given as list of positions
+	"""
+	if path == None:
+		return None
+
+	cost = 0.0
+	for i in range(len(path) - 1):
+		cost += math.sqrt((path[i][0] - path[i+1][0])**2 + (path[i][1] - path[i+1][1])**2)
+	return cost
+
+
+def countNodes(tree):
+	"""
+	return the number of nodes of the tree or list of trees
+	returned by plan
+	"""
+	if isinstance(tree, list):
+		return sum(len(t) for t in tree)
+	return len(tree)
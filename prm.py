@@ -0,0 +1,254 @@
+"""
+Author - Rajnish Tiwari
+
+PRM* (probabilistic roadmap) for many queries on the same map. The
+roadmap of random free points, each connected to every point within
+r = gamma*(log(n)/n)**(1/2), is built once per obstacle set and kept
+with it. A query only connects start and goal to the roadmap and
+searches the shortest path with A*, so it takes milliseconds instead
+of growing a new tree.
+
+With lazy = True (lazy PRM) the edges of the roadmap are not checked
+for obstacles when it is built. Only the edges of a path found by A*
+are checked, blocked edges are removed from the roadmap and the
+search is repeated.
+"""
+
+import heapq, math
+import numpy as np
+import spatial
+import collision
+import sampler
+from observer import Observer
+
+ROADMAP_SIZE = 2000 # number of points of the roadmap
+SAMPLE_BATCH = 256
+
+
+class Roadmap():
+	"""
+	Free points pos and the edges between them, neighbours[i] is the
+	dict mapping every neighbour of point i to the length of the edge
+	"""
+	def __init__(self, obstacleSet, size = ROADMAP_SIZE, lazy = False, sample = 'uniform', index = 'grid',
+				observer = None):
+		self.obstacleSet = obstacleSet
+		self.lazy = lazy
+		self.checked = set()
+		observer = observer if observer != None else Observer()
+
+		space = sampler.getFreeSpace(obstacleSet)
+		points = sampler.makeSampler(sample, obstacleSet, (0, 0))
+		pos = []
+		while len(pos) < size:
+			pos.extend(points.sample(SAMPLE_BATCH).tolist())
+		pos = pos[:size]
+		self.pos = np.array(pos, dtype = np.float64)
+
+		# radius of PRM* for 2 dimensions, gamma depends on the free area
+		gamma = 2*math.sqrt(1.5*space.area/math.pi)
+		self.radius = gamma*math.sqrt(math.log(size)/size)
+		self.index = spatial.makeIndex(index, self.radius)
+		self.index.insertMany(self.pos, np.arange(size))
+
+		self.neighbours = [{} for i in range(size)]
+		for i, p in enumerate(pos):
+			near = np.array(self.index.near(p, self.radius), dtype = np.int64)
+			near = near[near > i]
+			if len(near) == 0:
+				continue
+
+			if not lazy:
+				near = near[~obstacleSet.segmentsCollide(self.pos[near], p)]
+			lengths = np.hypot(self.pos[near, 0] - p[0], self.pos[near, 1] - p[1])
+			for j, d in zip(near.tolist(), lengths.tolist()):
+				self.neighbours[i][j] = d
+				self.neighbours[j][i] = d
+				observer.addEdge(p, pos[j])
+
+	def __len__(self):
+		return len(self.pos)
+
+	def connect(self, pos):
+		"""
+		return dict mapping the points within the radius of pos whose
+		edge to pos is free to the length of that edge
+		"""
+		near = np.array(self.index.near(pos, self.radius), dtype = np.int64)
+		if len(near) == 0:
+			return {}
+
+		near = near[~self.obstacleSet.segmentsCollide(self.pos[near], pos)]
+		lengths = np.hypot(self.pos[near, 0] - pos[0], self.pos[near, 1] - pos[1])
+		return dict(zip(near.tolist(), lengths.tolist()))
+
+	def checkEdge(self, i, j):
+		"""
+		return True if the edge between points i and j is free, in lazy
+		mode it is checked once and removed from the roadmap if blocked
+		"""
+		if not self.lazy:
+			return True
+
+		key = (min(i, j), max(i, j))
+		if key in self.checked:
+			return True
+
+		if self.obstacleSet.edgeCollide(tuple(self.pos[i].tolist()), tuple(self.pos[j].tolist())):
+			del self.neighbours[i][j]
+			del self.neighbours[j][i]
+			return False
+
+		self.checked.add(key)
+		return True
+
+
+def getRoadmap(obstacleSet, size = ROADMAP_SIZE, lazy = False, sample = 'uniform', index = 'grid',
+				observer = None):
+	"""
+	return the roadmap of obstacleSet, it is built once and kept with
+	the obstacle set so every query on the same set shares it
+	"""
+	key = (size, lazy, sample, index)
+	if obstacleSet.roadmap == None or obstacleSet.roadmap[0] != key:
+		obstacleSet.roadmap = key, Roadmap(obstacleSet, size, lazy, sample, index, observer)
+	return obstacleSet.roadmap[1]
+
+
+class PRMStar():
+	"""
+	Query of the roadmap of the obstacle set from start to goal
+	"""
+	def __init__(self, start, goal, obstacles, size = ROADMAP_SIZE, lazy = False, index = 'grid',
+				sample = 'uniform', observer = None):
+		self.start = start
+		self.goal = goal
+		self.obstacles = obstacles
+		self.obstacleSet = collision.asObstacleSet(obstacles)
+		self.size = size
+		self.lazy = lazy
+		self.indexKind = index
+		self.sample = sample
+		self.observer = observer if observer != None else Observer()
+		self.count = 0
+		self.goalCount = None
+
+	def dist(self, p1, p2):
+		"""
+		Distance between two points
+		"""
+		return math.sqrt((p1[0]-p2[0])**2 +(p1[1]-p2[1])**2)
+
+	def getRoadmap(self):
+		"""
+		Return the roadmap of the obstacle set, built if there is none
+		"""
+		return getRoadmap(self.obstacleSet, self.size, self.lazy, self.sample, self.indexKind, self.observer)
+
+	def search(self, roadmap, startLinks, goalLinks):
+		"""
+		A* search from start to goal, start and goal are the nodes
+		len(roadmap) and len(roadmap) + 1 connected by startLinks and
+		goalLinks. Return the list of nodes of the shortest path, None
+		if goal can not be reached
+		"""
+		n = len(roadmap)
+		start, goal = n, n + 1
+		h = np.hypot(roadmap.pos[:, 0] - self.goal[0], roadmap.pos[:, 1] - self.goal[1]).tolist()
+		h += [self.dist(self.start, self.goal), 0.0]
+
+		cost = {start: 0.0}
+		parent = {start: None}
+		closed = set()
+		heap = [(h[start], start)]
+
+		while heap:
+			f, u = heapq.heappop(heap)
+			if u in closed:
+				continue
+			closed.add(u)
+			self.count += 1
+
+			if u == goal:
+				nodes = []
+				while u != None:
+					nodes.append(u)
+					u = parent[u]
+				nodes.reverse()
+				return nodes
+
+			links = startLinks if u == start else roadmap.neighbours[u]
+			for v, d in links.items():
+				c = cost[u] + d
+				if c < cost.get(v, float('inf')):
+					cost[v] = c
+					parent[v] = u
+					heapq.heappush(heap, (c + h[v], v))
+
+			if u in goalLinks:
+				c = cost[u] + goalLinks[u]
+				if c < cost.get(goal, float('inf')):
+					cost[goal] = c
+					parent[goal] = u
+					heapq.heappush(heap, (c, goal))
+
+		return None
+
+	def getPath(self, roadmap):
+		"""
+		Return the list of positions of the shortest path from start
+		to goal through the roadmap, None if there is none. In lazy
+		mode the search is repeated until no edge of the path is blocked
+		"""
+		if self.dist(self.start, self.goal) <= roadmap.radius and \
+				not self.obstacleSet.edgeCollide(self.start, self.goal):
+			return [self.start, self.goal]
+
+		startLinks = roadmap.connect(self.start)
+		goalLinks = roadmap.connect(self.goal)
+
+		while True:
+			nodes = self.search(roadmap, startLinks, goalLinks)
+			if nodes == None:
+				return None
+
+			# edges to start and goal are always checked
+			inner = nodes[1:-1]
+			if all([roadmap.checkEdge(i, j) for i, j in zip(inner[:-1], inner[1:])]):
+				return [self.start] + [tuple(roadmap.pos[i].tolist()) for i in inner] + [self.goal]
+
+	def plan(self):
+		"""
+		Search the path without touching the pygame screen, the
+		roadmap is built on the first query of the obstacle set. Return
+		the path from start to goal as list of positions (None if not
+		found) and the roadmap
+		"""
+		self.count = 0
+		roadmap = self.getRoadmap()
+		path = self.getPath(roadmap)
+		if path == None:
+			return None, roadmap
+
+		self.goalCount = self.count
+		self.observer.goalReached(self.count)
+		self.observer.pathFound(path)
+		return path, roadmap
+
+	def run(self):
+		"""
+		Run the formulated PRM* algorithm when called
+		'''''Algorithm''''''
+		if there is no roadmap of the obstacles
+			sample n points in free space
+			connect every point to all points within distance r
+					r = gamma*(log(n)/n)**inv(no of dimension)
+		connect start and goal to all points within distance r
+		return the shortest path from start to goal found by A*
+		"""
+		path, roadmap = self.plan()
+		if path == None:
+			print("No Path Found in the Roadmap")
+			return
+
+		self.observer.wait()
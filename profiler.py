@@ -0,0 +1,181 @@
+"""
+Author - Rajnish Tiwari
+
+Per phase profiling of the planners. attach wraps the methods of one
+planner, of its obstacle set and of its observer which belong to a
+phase with counters and timers. A planner which is not attached calls
+its own methods, so profiling costs nothing when it is not used.
+Collision time is taken from the queries of the obstacle set itself,
+so every check counts whichever part of a planner makes it. The
+obstacle set can be shared, then the queries of the other planners
+using it are counted too.
+
+	profile = profiler.Profiler(trace = True)
+	profile.attach(planner)
+	planner.plan()
+	profile.save('profile.json')
+
+For every phase the number of calls, the time including nested phases
+and the self time without them are kept, e.g. the obstacle check done
+while looking for the nearest node counts to the time of nearest and
+collision but only to the self time of collision. With trace = True
+the self time of every phase is also recorded for every iteration.
+The report also holds the hits and misses of the edge cache of the
+obstacle set.
+"""
+
+import json, time
+
+# methods of the planners timed as each phase
+PHASES = (('sampling', ('getValidPoint',)),
+		('nearest', ('getNearestpoint',)),
+		('near', ('getNearnodes',)),
+		('rewire', ('updateTree',)),
+		('batch', ('getBatch',)),
+		('roadmap', ('getRoadmap',)),
+		('search', ('search',)))
+# methods of the obstacle set timed as collision, the single point and
+# edge queries go through these
+COLLISION = ('collides', 'segmentsCollide', 'edgeCollide')
+# methods of the observer timed as rendering, iteration also ends a trace row
+RENDER = ('addEdge', 'rewire', 'removeEdge', 'pathFound', 'iteration')
+
+timer = getattr(time, 'perf_counter', time.time)
+
+
+class Profiler():
+	"""
+	Counters and timers of the phases of attached planners
+	"""
+	def __init__(self, trace = False):
+		names = [phase for phase, methods in PHASES] + ['collision', 'render']
+		self.calls = dict((phase, 0) for phase in names)
+		self.time = dict((phase, 0.0) for phase in names)
+		self.selfTime = dict((phase, 0.0) for phase in names)
+		self.active = set()
+		self.stack = [] # time of nested phases of every running phase
+		self.row = {}
+		self.trace = [] if trace else None
+		self.edgeCache = None
+		self.startTime = timer()
+
+	def timed(self, phase, method):
+		"""
+		return method wrapped to count its calls and time as phase, a
+		call nested in the same phase is only counted
+		"""
+		def wrapper(*args, **kwargs):
+			self.calls[phase] += 1
+			if phase in self.active:
+				return method(*args, **kwargs)
+
+			self.active.add(phase)
+			nested = [0.0]
+			self.stack.append(nested)
+			start = timer()
+			try:
+				return method(*args, **kwargs)
+			finally:
+				elapsed = timer() - start
+				self.stack.pop()
+				self.active.discard(phase)
+				self.time[phase] += elapsed
+				self.selfTime[phase] += elapsed - nested[0]
+				self.row[phase] = self.row.get(phase, 0.0) + elapsed - nested[0]
+				if self.stack:
+					self.stack[-1][0] += elapsed
+		return wrapper
+
+	def wrap(self, obj, phase, names):
+		for name in names:
+			if hasattr(obj, name):
+				setattr(obj, name, self.timed(phase, getattr(obj, name)))
+
+	def attach(self, planner):
+		"""
+		profile planner, the two trees of BI_RRT* are profiled together
+		"""
+		for tree in (getattr(planner, 'RRT_from_start', None), getattr(planner, 'RRT_from_goal', None)):
+			if tree != None:
+				for phase, names in PHASES:
+					self.wrap(tree, phase, names)
+
+		for phase, names in PHASES:
+			self.wrap(planner, phase, names)
+
+		obstacleSet = planner.obstacleSet
+		self.edgeCache = obstacleSet.edgeCache
+		if getattr(obstacleSet, 'profiler', None) != self:
+			# planners sharing the set are only wrapped once
+			self.wrap(obstacleSet, 'collision', COLLISION)
+			obstacleSet.profiler = self
+
+		observer = planner.observer
+		self.wrap(observer, 'render', RENDER)
+		render = observer.iteration
+		def iteration(count):
+			render(count)
+			self.endIteration(count)
+		observer.iteration = iteration
+
+	def endIteration(self, count):
+		"""
+		record the self time of the phases since the last iteration
+		"""
+		if self.trace != None:
+			self.row['iteration'] = count
+			self.row['t'] = timer() - self.startTime
+			self.trace.append(self.row)
+		self.row = {}
+
+	def report(self):
+		"""
+		return dict of the calls, time and self time of every phase,
+		the wall time since the profiler was made, the counts of the
+		edge cache and the trace
+		"""
+		wall = timer() - self.startTime
+		phases = dict((phase, {'calls': self.calls[phase], 'time': self.time[phase], 'self': self.selfTime[phase]})
+					for phase in self.calls)
+		report = {'wall': wall, 'other': wall - sum(self.selfTime.values()), 'phases': phases}
+		if self.edgeCache != None:
+			report['edge cache'] = self.edgeCache.stats()
+		if self.trace != None:
+			report['trace'] = self.trace
+		return report
+
+	def save(self, path):
+		"""
+		store the report as JSON in file path
+		"""
+		with open(path, 'w') as f:
+			json.dump(self.report(), f, indent = 1, sort_keys = True)
+
+
+def printReport(reports):
+	"""
+	print the phases and the edge cache counts of the list of reports
+	summed over all of them, e.g. the runs of one benchmark case
+	"""
+	wall = sum(r['wall'] for r in reports)
+	other = sum(r['other'] for r in reports)
+	phases = {}
+	for r in reports:
+		for phase, p in r['phases'].items():
+			total = phases.setdefault(phase, {'calls': 0, 'time': 0.0, 'self': 0.0})
+			for key in total:
+				total[key] += p[key]
+
+	print('%-12s%10s%12s%12s%8s' % ('phase', 'calls', 'time', 'self', '%'))
+	for phase in sorted(phases, key = lambda p: -phases[p]['self']):
+		p = phases[phase]
+		print('%-12s%10d%12.4f%12.4f%8.1f' % (phase, p['calls'], p['time'], p['self'],
+											100.0*p['self']/wall if wall else 0.0))
+	print('%-12s%10s%12s%12.4f' % ('other', '', '', other))
+
+	caches = [r['edge cache'] for r in reports if 'edge cache' in r]
+	if caches:
+		hits = sum(c['hits'] for c in caches)
+		misses = sum(c['misses'] for c in caches)
+		print('edge cache  %d hits, %d misses, hit rate %.3f' % (hits, misses,
+																hits/float(hits + misses) if hits + misses else 0.0))
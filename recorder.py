@@ -0,0 +1,166 @@
+"""
+Author - Rajnish Tiwari
+
+Recording the growth of the planner trees during headless runs so it
+can be watched later with replay.py. Recorder is an observer which
+packs every event of the planner into a compact binary log.
+
+File layout, all numbers little endian
+
+	8 bytes   magic 'SBMPEVNT'
+	4 bytes   length of the JSON header
+	header    {"version": 1, "obstacles": [... as maps.py ...],
+	           "start": [x, y], "goal": [x, y]}
+	events    1 byte code followed by the values of EVENTS, the path
+	          event is followed by its number of points times x, y
+
+Positions are stored as float32, so an added edge takes 17 bytes.
+
+	recorder = Recorder('run.events', obstacles, start, goal)
+	planner = RRTStar(start, goal, obstacles, observer = recorder)
+	planner.plan()
+	recorder.close()
+"""
+
+import json, struct
+import numpy as np
+
+import maps
+from observer import Observer
+
+MAGIC = b'SBMPEVNT'
+FORMAT_VERSION = 1
+FLUSH_SIZE = 1 << 16 # bytes of events buffered before they are written
+
+# code and packed values of every event
+ADD_EDGE, REWIRE, REMOVE_EDGE, GOAL_REACHED, COST_IMPROVED, ITERATION, PATH_FOUND = range(1, 8)
+EVENTS = {ADD_EDGE: struct.Struct('<B4f'),       # pos1, pos2
+		REWIRE: struct.Struct('<B6f'),           # oldParentPos, newParentPos, pos
+		REMOVE_EDGE: struct.Struct('<B4f'),      # pos1, pos2
+		GOAL_REACHED: struct.Struct('<BI'),      # count
+		COST_IMPROVED: struct.Struct('<BIf'),    # count, cost
+		ITERATION: struct.Struct('<BI'),         # count
+		PATH_FOUND: struct.Struct('<BI')}        # number of points
+POINT = struct.Struct('<2f')
+EDGES = np.dtype([('code', 'u1'), ('pos1', '<f4', 2), ('pos2', '<f4', 2)]) # packed like ADD_EDGE
+
+
+class Recorder(Observer):
+	"""
+	Observer writing every event of the planner to the log file path,
+	the events are also passed on to observer if it is given
+	"""
+	def __init__(self, path, obstacles, start, goal, observer = None):
+		self.observer = observer if observer != None else Observer()
+		self.buffer = bytearray()
+		self.file = open(path, 'wb')
+		header = json.dumps({'version': FORMAT_VERSION, 'obstacles': maps.toData(obstacles),
+							'start': list(start), 'goal': list(goal)}).encode('utf-8')
+		self.file.write(MAGIC)
+		self.file.write(struct.pack('<I', len(header)))
+		self.file.write(header)
+
+	def record(self, code, *values):
+		self.buffer += EVENTS[code].pack(code, *values)
+		if len(self.buffer) > FLUSH_SIZE:
+			self.flush()
+
+	def flush(self):
+		self.file.write(self.buffer)
+		self.file.flush()
+		self.buffer = bytearray()
+
+	def close(self):
+		"""
+		write the buffered events and close the log
+		"""
+		if not self.file.closed:
+			self.flush()
+			self.file.close()
+
+	def addEdge(self, pos1, pos2):
+		self.record(ADD_EDGE, pos1[0], pos1[1], pos2[0], pos2[1])
+		self.observer.addEdge(pos1, pos2)
+
+	def addEdges(self, positions1, positions2):
+		"""
+		the edges are packed with one numpy record array
+		"""
+		edges = np.zeros(len(positions1), dtype = EDGES)
+		edges['code'] = ADD_EDGE
+		edges['pos1'] = positions1
+		edges['pos2'] = positions2
+		self.buffer += edges.tobytes()
+		if len(self.buffer) > FLUSH_SIZE:
+			self.flush()
+		self.observer.addEdges(positions1, positions2)
+
+	def rewire(self, oldParentPos, newParentPos, pos):
+		self.record(REWIRE, oldParentPos[0], oldParentPos[1], newParentPos[0], newParentPos[1], pos[0], pos[1])
+		self.observer.rewire(oldParentPos, newParentPos, pos)
+
+	def removeEdge(self, pos1, pos2):
+		self.record(REMOVE_EDGE, pos1[0], pos1[1], pos2[0], pos2[1])
+		self.observer.removeEdge(pos1, pos2)
+
+	def goalReached(self, count):
+		self.record(GOAL_REACHED, count)
+		self.observer.goalReached(count)
+
+	def costImproved(self, count, cost):
+		self.record(COST_IMPROVED, count, cost)
+		self.observer.costImproved(count, cost)
+
+	def iteration(self, count):
+		self.record(ITERATION, count)
+		self.observer.iteration(count)
+
+	def pathFound(self, path):
+		"""
+		the path ends the search, so the log is flushed and complete
+		even if it is never closed
+		"""
+		self.buffer += EVENTS[PATH_FOUND].pack(PATH_FOUND, len(path))
+		for pos in path:
+			self.buffer += POINT.pack(pos[0], pos[1])
+		self.flush()
+		self.observer.pathFound(path)
+
+	def wait(self):
+		self.close()
+		self.observer.wait()
+
+
+def load(path):
+	"""
+	return the header of the log file path and the list of its events
+	as (code, values), values of the path event is the list of points
+	"""
+	with open(path, 'rb') as f:
+		if f.read(len(MAGIC)) != MAGIC:
+			raise ValueError(path + ' is not an event log')
+		length, = struct.unpack('<I', f.read(4))
+		header = json.loads(f.read(length).decode('utf-8'))
+		data = f.read()
+
+	if header['version'] != FORMAT_VERSION:
+		raise ValueError('unsupported event log version %s' % header['version'])
+
+	events = []
+	offset = 0
+	while offset < len(data):
+		code = data[offset] if isinstance(data[offset], int) else ord(data[offset])
+		event = EVENTS[code]
+		if offset + event.size > len(data):
+			break # log of a run which was stopped while writing
+		values = event.unpack_from(data, offset)[1:]
+		offset += event.size
+
+		if code == PATH_FOUND:
+			n = values[0]
+			if offset + n*POINT.size > len(data):
+				break
+			values = [POINT.unpack_from(data, offset + i*POINT.size) for i in range(n)]
+			offset += n*POINT.size
+		events.append((code, values))
+	return header, events
@@ -0,0 +1,89 @@
+"""
+Author - Rajnish Tiwari
+
+Replay an event log written by recorder.Recorder into PNG frames
+without a window, pygame draws on its dummy video driver.
+
+	python replay.py run.events --out frames --every 100
+
+A frame is saved every 'every' iterations, when the goal is reached
+and after the final path is drawn. The frames can be joined to an
+animation with any video tool, e.g.
+
+	ffmpeg -framerate 10 -i frames/frame%05d.png run.mp4
+"""
+
+import argparse, os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+
+import envr
+import maps
+import recorder
+
+EVERY = 100 # iterations between two frames
+
+
+def drawMap(header):
+	"""
+	draw the obstacles, start and goal of the log on an empty screen
+	"""
+	envr.screen.fill(envr.white)
+	envr.redraw(maps.fromData(header['obstacles']))
+	start = [int(v) for v in header['start']]
+	goal = [int(v) for v in header['goal']]
+	pygame.draw.circle(envr.screen, envr.red, start, envr.GOAL_RADIUS)
+	pygame.draw.circle(envr.screen, envr.green, goal, envr.GOAL_RADIUS)
+
+
+def replay(path, out, every = EVERY):
+	"""
+	draw the events of the log file path and save the frames in
+	directory out, return the number of saved frames
+	"""
+	header, events = recorder.load(path)
+	envr.initScreen()
+	if not os.path.isdir(out):
+		os.makedirs(out)
+
+	frames = [0]
+	def save():
+		pygame.image.save(envr.screen, os.path.join(out, 'frame%05d.png' % frames[0]))
+		frames[0] += 1
+
+	drawMap(header)
+	for code, values in events:
+		if code == recorder.ADD_EDGE:
+			envr.drawPath(values[:2], values[2:], envr.cyan)
+		elif code == recorder.REWIRE:
+			envr.drawPath(values[:2], values[4:], envr.white)
+			envr.drawPath(values[2:4], values[4:], envr.blue)
+		elif code == recorder.REMOVE_EDGE:
+			envr.drawPath(values[:2], values[2:], envr.white)
+		elif code == recorder.GOAL_REACHED:
+			save()
+		elif code == recorder.ITERATION:
+			if values[0] % every == 0:
+				save()
+		elif code == recorder.PATH_FOUND:
+			for i in range(len(values) - 1):
+				envr.drawPath(values[i], values[i + 1], envr.red, 6)
+			save()
+
+	return frames[0]
+
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = 'replay an event log of a planner into PNG frames')
+	parser.add_argument('log', help = 'event log written by recorder.Recorder')
+	parser.add_argument('--out', default = 'frames', help = 'directory of the frames')
+	parser.add_argument('--every', type = int, default = EVERY, help = 'iterations between two frames')
+	args = parser.parse_args(argv)
+
+	n = replay(args.log, args.out, args.every)
+	print('%d frames saved in %s' % (n, args.out))
+
+
+if __name__ == '__main__':
+
+	main()
@@ -4,53 +4,99 @@ Author - Rajnish Tiwari
 This is normal RRT algorithm which will search a path 
 between two given point start loaction and goal 
 loaction while avoiding the given obstacles.
+
+The node to extend from is found by Expansion, see expansion.py for
+the batch mode.
 """ 
 
-import math, sys, random, pygame
+import math
+import numpy as np
 import envr
+import spatial
+import collision
+import sampler
+import store
+from tree import Tree
+from observer import Observer
+from expansion import Expansion, delta
 
-delta = 10.0
 MIN_DISTANCE_TO_ADD = 1.0
 MAX_ITER = 5000
+SAMPLE_BATCH = 64 # number of random points drawn together by getValidPoint
 
-screen = envr.screen
-
-
-class Node():
-    def __init__(self, pos, parent = None):
-        self.pos = pos
-        self.parent = parent
 
-class RRT():
+class RRT(Expansion):
 	"""
 	Create the RRT class to search the path between start and goal
-	while avoiding the obstacles.
+	while avoiding the obstacles. Nodes are the indexes of the
+	rows of the tree.
 	"""
-	def __init__(self, start, goal, obstacles):
-		self.start = Node(start)
-		self.goalNode = Node(goal)
+	def __init__(self, start, goal, obstacles, max_iter = MAX_ITER, index = 'grid', sample = 'uniform',
+				warm = None, batch = 1, observer = None):
+		self.start = start
+		self.goal = goal
 		self.obstacles = obstacles
-		self.nodes = []
-		self.nodes.append(self.start)
+		self.obstacleSet = collision.asObstacleSet(obstacles)
+		self.sampler = sampler.makeSampler(sample, self.obstacleSet, goal)
+		self.freePoints = []
+		self.tree = Tree()
+		self.indexKind = index
+		self.index = spatial.makeIndex(index, delta)
+		self.observer = observer if observer != None else Observer()
+		self.addNode(start)
+		self.MAX_ITER = max_iter
+		self.goalCount = None
+		self.batch = batch
+		self.batchPoints = []
+		self.batchSize = 0
+		if warm != None:
+			self.warmStart(warm)
+
+	def warmStart(self, stored):
+		"""
+		continue growing the tree stored by store.save on the same map,
+		it is connected to start and goal and every node of it is added
+		"""
+		tree = store.warmTree(stored, self.start, self.obstacleSet, self.goal)
+		if tree == None:
+			return
+
+		self.tree = tree
+		self.index = spatial.makeIndex(self.indexKind, delta)
+		positions = tree.getPositions()
+		self.index.insertMany(positions, np.arange(len(tree)))
+		self.observer.addEdges(positions[tree.parent[1:tree.size]], positions[1:])
+
+	def addNode(self, pos, parent = -1):
+		"""
+		add node at pos to the tree and to the nearest neighbour index,
+		return the index of the new node
+		"""
+		cost = 0.0
+		if parent != -1:
+			parentPos = self.tree.getPos(parent)
+			cost = self.tree.cost[parent] + self.dist(parentPos, pos)
+			self.observer.addEdge(parentPos, pos)
+
+		i = self.tree.add(pos, parent, cost)
+		self.index.insert(pos, i)
+		return i
 
 
 	def checkObst(self, pos):
 		"""
 		Check if given position is in free space
 		"""
-		for obs in self.obstacles:
-		    if obs.isCollide(pos) == True:
-		        return True
-		return False
+		return self.obstacleSet.collide(pos)
 
-	def getValidPoint(self, XDIM = envr.XDIM, YDIM = envr.YDIM):
+	def getValidPoint(self):
 		"""
-		Generate a random point which is in free sapce
+		Generate a random point which is in free sapce, points are
+		drawn by the sampler in batches and kept for the next calls
 		"""
-		while True:
-		    p = (random.random()*XDIM, random.random()*YDIM)
-		    if not self.checkObst(p):
-		        return p
+		while len(self.freePoints) == 0:
+			self.freePoints = self.sampler.sample(SAMPLE_BATCH).tolist()
+		return tuple(self.freePoints.pop())
 
 	def dist(self, p1, p2):
 		"""
@@ -59,12 +105,13 @@ class RRT():
 		return math.sqrt((p1[0]-p2[0])**2 +(p1[1]-p2[1])**2)
 
 
-	def checkGoal(self, node):
+	def checkGoal(self, pos):
 		"""
-		Check if point reached to the goal region
+		Check if point reached to the goal region and the last edge
+		of the path from it to the goal is free
 		"""
-		if (self.dist(node.pos, self.goalNode.pos) <= envr.GOAL_RADIUS):
-			return True
+		if (self.dist(pos, self.goal) <= envr.GOAL_RADIUS):
+			return not self.obstacleSet.segmentCollide(pos, self.goal)
 
 		return False
 
@@ -79,20 +126,6 @@ class RRT():
 			theta = math.atan2(p2[1]-p1[1],p2[0]-p1[0])
 			return p1[0] + delta*math.cos(theta), p1[1] + delta*math.sin(theta)
 
-	def getNearestpoint(self, point):
-		"""
-		Return the a node in tree which is nearest to given point
-		"""
-		nearestPoint = self.nodes[0]
-		sucess = False
-		for p in self.nodes:
-			if self.dist(p.pos,point) <= self.dist(nearestPoint.pos,point):
-				newPoint = self.steer(p.pos,point)
-				if not self.checkObst(newPoint):
-					nearestPoint = p
-					sucess = True
-		return sucess, nearestPoint
-
 	def getRandompoint(self):
 		"""
 		Sample a random point in search space which is also in free space
@@ -106,10 +139,60 @@ class RRT():
 	def getNext(self):
 		"""
 		get the random generated node which is in free space
+		and add it to the tree
 		"""
-		point, parentNode = self.getRandompoint()
-		newnode = self.steer(parentNode.pos,point)
-		return Node(newnode, parentNode)
+		if self.batch > 1:
+			newnode, parentNode = self.getBatchpoint()
+		else:
+			point, parentNode = self.getRandompoint()
+			newnode = self.steer(self.tree.getPos(parentNode),point)
+		return self.addNode(newnode, parentNode)
+
+	def getPath(self, node):
+		"""
+		Return the list of positions from start to given node
+		and on to the goal
+		"""
+		path = self.tree.getPath(node)
+		if path[-1] != tuple(self.goal):
+			path.append(self.goal)
+		return path
+
+	def plan(self):
+		"""
+		Search the path without touching the pygame screen, every
+		drawing is left to the observer. Return the path from start
+		to goal as list of positions (None if not found) and the
+		tree
+		"""
+		self.count = 0
+
+		nearGoal = self.index.near(self.goal, envr.GOAL_RADIUS)
+		if nearGoal:
+			# a warm started tree can already reach the goal region
+			self.goalCount = 0
+			self.observer.goalReached(0)
+			path = self.getPath(nearGoal[0])
+			self.observer.pathFound(path)
+			return path, self.tree
+
+		while True:
+			self.count += 1
+
+			if self.count < self.MAX_ITER:
+				newNode = self.getNext()
+
+				if self.checkGoal(self.tree.getPos(newNode)):
+					self.goalCount = self.count
+					self.observer.goalReached(self.count)
+					path = self.getPath(newNode)
+					self.observer.pathFound(path)
+					return path, self.tree
+
+			else:
+				return None, self.tree
+
+			self.observer.iteration(self.count)
 
 	def run(self):
 		"""
@@ -126,39 +209,9 @@ class RRT():
 				if newnode is in goal region
 					return path
 		"""
+		path, tree = self.plan()
+		if path == None:
+			print("Maximum Number of Iteration Reached")
+			return
 
-		self.currentState = 'solving'
-		self.count = 0
-
-		while True:
-
-			envr.screenUpdate()
-
-			if self.currentState == 'solving':
-				self.count += 1
-
-				if self.count < MAX_ITER:
-					newNode = self.getNext()
-					self.nodes.append(newNode)
-					envr.drawPath(newNode.parent.pos, newNode.pos, envr.cyan)
-
-					if self.checkGoal(newNode):
-						self.currentState = 'solved'
-						self.goalNode.parent = newNode
-
-				else:
-					print("Maximum Number of Iteration Reached")
-					return
-
-			elif self.currentState == 'solved':
-				currNode = self.goalNode
-				pygame.display.set_caption('Found the path')
-
-				while currNode.parent != None:
-					envr.drawPath(currNode.pos,currNode.parent.pos, envr.red, 6)
-					currNode = currNode.parent
-
-			for e in pygame.event.get():
-				if e.type == pygame.QUIT or (e.type == pygame.KEYUP and e.key == pygame.K_ESCAPE):
-					sys.exit("Initiated Exit")
-
+		self.observer.wait()
@@ -8,55 +8,146 @@ between two given point start loaction and goal
 loaction while avoiding the given obstacles. It can be terminated
 either once reached to goal location or when max iteration reached
 depending on selection
+
+The node to extend from is found by Expansion, see expansion.py for
+the batch mode, choosing the parent and rewiring is done node by node.
 """
 
-import math, sys, random, pygame
+import math, time
+import numpy as np
 import envr
+import spatial
+import collision
+import sampler
+import store
+from tree import Tree
+from observer import Observer
+from expansion import Expansion, delta
 
-delta = 10.0
 MIN_DISTANCE_TO_ADD = 1.0
 MAX_ITER = 5000
+SAMPLE_BATCH = 64 # number of random points drawn together by getValidPoint
 
 gamma = 300
-expansionDis = 4
+PRUNE_RATIO = 0.01 # informed mode prunes the tree when the best cost dropped by this fraction
+PRUNE_TOLERANCE = 1e-6
+
+# eager    - every edge to the near nodes is checked for obstacles
+# lazy     - candidate parents are checked in order of their cost until
+#            the first free edge is found
+# deferred - edges are only checked once a path to the goal is extracted,
+#            blocked edges found there are repaired
+CHECK_MODES = ('eager', 'lazy', 'deferred')
+
+
+class RRTStar(Expansion):
+	"""
+	Create the RRT* class, nodes are the indexes of the rows of
+	the tree which also keeps the path cost of every node.
+	"""
+	def __init__(self, start, goal, obstacles, iter_limit = False, max_iter = MAX_ITER, index = 'grid',
+				sample = 'uniform', informed = False, check = 'eager', warm = None, batch = 1, observer = None):
+		if check not in CHECK_MODES:
+			raise ValueError('unknown check mode %s' % check)
+
+		self.start = start
+		self.goal = goal
+		self.obstacles = obstacles
+		self.obstacleSet = collision.asObstacleSet(obstacles)
+		self.sampler = sampler.makeSampler(sample, self.obstacleSet, goal)
+		self.informed = informed
+		if informed:
+			self.sampler = sampler.InformedSampler(self.sampler, start, goal)
+		self.freePoints = []
+		self.batch = batch
+		self.batchPoints = []
+		self.batchSize = 0
+		self.tree = Tree()
+		self.indexKind = index
+		self.index = spatial.makeIndex(index, delta)
+		self.observer = observer if observer != None else Observer()
+		self.check = check
+		self.edgeChecks = 0
+		self.nearFree = np.zeros(0, dtype = np.int8) # edges checked by chooseParent, see updateTree
+		self.repairCount = 0
+		self.maxEdge = 0.0 # length of the longest edge ever added, bounds the search of invalidate
+		self.addNode(start)
+		self.iter_limit = iter_limit
+		self.MAX_ITER = max_iter
+		self.goalCount = None
+		self.changedNodes = []
+		self.rewireCount = 0
+		self.propagatedCount = 0
+		self.bestNode = None
+		self.bestCost = float('inf')
+		self.pruneCost = float('inf')
+		self.prunedCount = 0
+		self.cancelled = False
+		self.count = 0
+		if warm != None:
+			self.warmStart(warm)
 
-screen = envr.screen
+	def warmStart(self, stored):
+		"""
+		continue growing the tree stored by store.save on the same map,
+		it is connected to start and goal and every node of it is added
+		"""
+		tree = store.warmTree(stored, self.start, self.obstacleSet, self.goal)
+		if tree == None:
+			return
 
+		self.setTree(tree)
+		positions = tree.getPositions()
+		self.observer.addEdges(positions[tree.parent[1:tree.size]], positions[1:])
 
-class Node():
-    def __init__(self, pos, parent = None):
-        self.pos = pos
-        self.parent = parent
-        self.cost = 0
+	def setTree(self, tree):
+		"""
+		continue with tree rooted at start instead of the current tree,
+		the nearest neighbour index is built for it
+		"""
+		self.tree = tree
+		self.batchPoints = []
+		self.index = spatial.makeIndex(self.indexKind, delta)
+		self.index.insertMany(tree.getPositions(), np.arange(len(tree)))
 
-class RRTStar():
-	def __init__(self, start, goal, obstacles, iter_limit = False, max_iter = MAX_ITER):
-		self.start = Node(start)
-		self.goalNode = Node(goal)
-		self.obstacles = obstacles
-		self.nodes = []
-		self.nodes.append(self.start)
-		self.iter_limit = iter_limit
-		self.MAX_ITER = max_iter
+		if tree.size > 1:
+			lengths = tree.cost[1:tree.size] - tree.cost[tree.parent[1:tree.size]]
+			self.maxEdge = max(self.maxEdge, float(lengths.max()))
+		self.resetBest()
+
+	def addNode(self, pos, parent = -1, checked = True):
+		"""
+		add node at pos to the tree and to the nearest neighbour index,
+		checked is False if the edge from parent is not checked for
+		obstacles yet. Return the index of the new node
+		"""
+		cost = 0.0
+		if parent != -1:
+			parentPos = self.tree.getPos(parent)
+			length = self.dist(parentPos, pos)
+			cost = self.tree.cost[parent] + length
+			self.maxEdge = max(self.maxEdge, length)
+			self.observer.addEdge(parentPos, pos)
+
+		i = self.tree.add(pos, parent, cost, checked)
+		self.index.insert(pos, i)
+		return i
 
 
 	def checkObst(self, pos):
 		"""
 		Check if given position is in free space
 		"""
-		for obs in self.obstacles:
-		    if obs.isCollide(pos) == True:
-		        return True
-		return False
+		return self.obstacleSet.collide(pos)
 
-	def getValidPoint(self, XDIM = envr.XDIM, YDIM = envr.YDIM):
+	def getValidPoint(self):
 		"""
-		Generate a random point which is in free sapce
+		Generate a random point which is in free sapce, points are
+		drawn by the sampler in batches and kept for the next calls
 		"""
-		while True:
-		    p = (random.random()*XDIM, random.random()*YDIM)
-		    if not self.checkObst(p):
-		        return p
+		while len(self.freePoints) == 0:
+			self.freePoints = self.sampler.sample(SAMPLE_BATCH).tolist()
+		return tuple(self.freePoints.pop())
 
 	def dist(self, p1, p2):
 		"""
@@ -65,11 +156,11 @@ class RRTStar():
 		return math.sqrt((p1[0]-p2[0])**2 +(p1[1]-p2[1])**2)
 
 
-	def checkGoal(self, node):
+	def checkGoal(self, pos):
 		"""
 		Check if point reached to the goal region
 		"""
-		if (self.dist(node.pos, self.goalNode.pos) <= envr.GOAL_RADIUS):
+		if (self.dist(pos, self.goal) <= envr.GOAL_RADIUS):
 			return True
 
 		return False
@@ -85,20 +176,6 @@ class RRTStar():
 			theta = math.atan2(p2[1]-p1[1],p2[0]-p1[0])
 			return p1[0] + delta*math.cos(theta), p1[1] + delta*math.sin(theta)
 
-	def getNearestpoint(self, point):
-		"""
-		Return the a node in tree which is nearest to given point
-		"""
-		nearestPoint = self.nodes[0]
-		success = False
-		for p in self.nodes:
-			if self.dist(p.pos,point) <= self.dist(nearestPoint.pos,point):
-				newPoint = self.steer(p.pos,point)
-				if not self.checkObst(newPoint):
-					nearestPoint = p
-					success = True
-		return success, nearestPoint
-
 	def getRandompoint(self):
 		"""
 		Sample a random point in search space which is also in free space
@@ -109,78 +186,143 @@ class RRTStar():
 			success, nearestPoint = self.getNearestpoint(point)
 		return point, nearestPoint
 
-	def getNearnodes(self, newNode):
+	def getNearnodes(self, pos):
 		"""
-		get all nodes within r distance from newNode
+		get all nodes within r distance from pos
 		where r = gamma*(log(no of nodes in tree)/no of nodes in tree)**
 												(inv of no of dimension)
 		"""
-		nnodes = len(self.nodes)
+		nnodes = len(self.tree)
 		r = gamma*math.sqrt(math.log(nnodes)/nnodes)
-		nearNodes = []
-		for p in self.nodes:
-			if self.dist(newNode.pos, p.pos) <= r:
-				nearNodes.append(p)
-		return nearNodes
+		return np.array(self.index.near(pos, r), dtype = np.int64)
 
-	def chooseParent(self, newNode, nearNodes):
+	def chooseParent(self, pos, nearNodes):
 		"""
 		select the parent node with lowest path cost from start node
-		from all nodes within r distance
+		from all nodes within r distance of pos, None if every edge
+		from those nodes to pos is blocked. In lazy mode the nodes are
+		checked in order of cost until the first free edge, in deferred
+		mode the edge to the cheapest node is not checked at all
 		"""
 		if len(nearNodes) == 0:
-			return newNode
+			return None
 
-		clist = []
-		for p in nearNodes:
-			clist.append(self.checkCost(p, newNode))
+		# edge from every near node is free (1), blocked (0) or not checked (-1)
+		self.nearFree = np.full(len(nearNodes), -1, dtype = np.int8)
 
-		minCost = min(clist)
-		minNode = nearNodes[clist.index(minCost)]
+		if self.check == 'eager':
+			clist = self.checkCosts(nearNodes, pos)
+			self.nearFree = (clist != float('inf')).astype(np.int8)
+			i = np.argmin(clist)
 
-		if minCost == float('inf'):
-			return newNode
+			if clist[i] == float('inf'):
+				return None
 
-		newNode.cost = minCost
-		newNode.parent = minNode
-		return newNode
+			return int(nearNodes[i])
+
+		positions = self.tree.pos[nearNodes]
+		clist = self.tree.cost[nearNodes] + np.hypot(positions[:, 0] - pos[0], positions[:, 1] - pos[1])
+		order = np.argsort(clist)
+
+		if self.check == 'deferred':
+			return int(nearNodes[order[0]])
 
+		for i in order.tolist():
+			self.nearFree[i] = self.checkEdges(nearNodes[i:i+1], pos)[0]
+			if self.nearFree[i]:
+				return int(nearNodes[i])
+		return None
 
-	def checkCost(self, p, newNode):
+
+	def checkCost(self, p, pos):
 		"""
-		get the path cost from node p to newNode
-		if there is obstacle between nodes return
+		get the path cost from node p to pos
+		if there is obstacle between them return
 		infinite as path cost
 		"""
-		tmpNode = Node(p.pos)
+		pPos = self.tree.getPos(p)
+		self.edgeChecks += 1
+		if self.obstacleSet.edgeCollide(pPos, pos):
+			return float('inf')
+
+		return self.tree.cost[p] + self.dist(pPos, pos)
 
-		dy = newNode.pos[1] - p.pos[1]
-		dx = newNode.pos[0] - p.pos[0]
-		d = math.sqrt(dy**2 + dx**2)
-		theta = math.atan2(dy, dx)
-		for i in range(int(d/expansionDis)):
-			x = tmpNode.pos[0] + expansionDis*math.cos(theta)
-			y = tmpNode.pos[1] + expansionDis*math.sin(theta)
-			tmpNode = Node((x,y))
-			if self.checkObst(tmpNode.pos):
-				return float('inf')
+	def checkCosts(self, nodes, pos):
+		"""
+		get the array of path costs from each of nodes to pos,
+		all edges are checked for obstacles together
+		"""
+		positions = self.tree.pos[nodes]
+		clist = self.tree.cost[nodes] + np.hypot(positions[:, 0] - pos[0], positions[:, 1] - pos[1])
+		clist[~self.checkEdges(nodes, pos)] = float('inf')
+		return clist
 
-		return p.cost + d
+	def checkEdges(self, nodes, pos):
+		"""
+		return bool array which is True where the edge from the node to
+		pos is free
+		"""
+		self.edgeChecks += len(nodes)
+		return ~self.obstacleSet.segmentsCollide(self.tree.pos[nodes], pos)
 
 	def updateTree(self, newNode, nearNodes):
 		"""
 		update the tree by reruiting the existing node which
 		is less than r distance from newNode and if path cost
-		through newNode is less than current cost
+		through newNode is less than current cost, the cost change
+		is pushed down the subtree of every rewired node and all
+		of them are added to changedNodes. Edges already checked by
+		chooseParent are taken from nearFree, in deferred mode the new
+		edges are not checked for obstacles
 		"""
-		for i in range(len(nearNodes)):
-			cost = newNode.cost + self.dist(nearNodes[i].pos, newNode.pos)
-			if nearNodes[i].cost > cost:
-				if self.checkCost(nearNodes[i], newNode) != float('inf'):
-					envr.drawPath(nearNodes[i].parent.pos, nearNodes[i].pos, envr.white)
-					nearNodes[i].parent = newNode
-					nearNodes[i].cost = cost
-					envr.drawPath(newNode.pos, nearNodes[i].pos, envr.blue)
+		if len(nearNodes) == 0:
+			return
+
+		pos = self.tree.getPos(newNode)
+		positions = self.tree.pos[nearNodes]
+		costs = self.tree.cost[newNode] + np.hypot(positions[:, 0] - pos[0], positions[:, 1] - pos[1])
+		better = self.tree.cost[nearNodes] > costs
+		if not better.any():
+			return
+
+		candidates = nearNodes[better]
+		costs = costs[better]
+		if self.check == 'deferred':
+			free = np.ones(len(candidates), dtype = bool)
+		else:
+			known = self.nearFree[better]
+			unknown = np.flatnonzero(known == -1)
+			if len(unknown):
+				known[unknown] = self.checkEdges(candidates[unknown], pos)
+			free = known == 1
+
+		for p, cost in zip(candidates[free].tolist(), costs[free].tolist()):
+			# an earlier rewire in this loop may already have lowered the cost of p
+			if self.tree.cost[p] <= cost:
+				continue
+
+			self.observer.rewire(self.tree.getPos(self.tree.parent[p]), pos, self.tree.getPos(p))
+			self.tree.setParent(p, newNode)
+			self.tree.checked[p] = self.check != 'deferred'
+			self.maxEdge = max(self.maxEdge, cost - self.tree.cost[newNode])
+			self.propagateCost(p, self.tree.cost[p] - cost)
+			self.changedNodes.append(p)
+
+	def propagateCost(self, node, change):
+		"""
+		lower the cost of node and of all nodes below it by change
+		(raise it if change is negative), only the rewired subtree
+		is visited. The descendants are added
+		to changedNodes and counted in propagatedCount
+		"""
+		subtree = self.tree.getSubtree(node)
+		self.tree.cost[node] -= change
+		if subtree:
+			self.tree.cost[subtree] -= change
+			self.changedNodes.extend(subtree)
+
+		self.rewireCount += 1
+		self.propagatedCount += len(subtree)
 
 
 	def getNext(self):
@@ -188,13 +330,29 @@ class RRTStar():
 		get the random generated node which is in free space
 		update the tree by reruiting the existing node which
 		is less than r distance from newNode and if path cost
-		through newNode is less than current cost
+		through newNode is less than current cost, changedNodes holds
+		the nodes whose cost was lowered by this call
 		"""
-		point, nearestPoint = self.getRandompoint()
-		newNode = self.steer(nearestPoint.pos,point)
-		newNode = Node(newNode, nearestPoint)
-		nearNodes = self.getNearnodes(newNode)
-		newNode = self.chooseParent(newNode, nearNodes)
+		self.changedNodes = []
+		while True:
+			if self.batch > 1:
+				pos, nearestPoint = self.getBatchpoint()
+			else:
+				point, nearestPoint = self.getRandompoint()
+				pos = self.steer(self.tree.getPos(nearestPoint),point)
+			nearNodes = self.getNearnodes(pos)
+			parent = self.chooseParent(pos, nearNodes)
+			checked = self.check != 'deferred'
+			if parent != None:
+				break
+
+			# without a near parent the nearest node is only taken if its edge is free
+			if self.checkEdges(np.array([nearestPoint]), pos)[0]:
+				parent = nearestPoint
+				checked = True
+				break
+
+		newNode = self.addNode(pos, parent, checked)
 		self.updateTree(newNode, nearNodes)
 		return newNode
 
@@ -202,26 +360,376 @@ class RRTStar():
 		"""
 		find all nodes which is near to goal
 		"""
-		nearGoal = []
-		for p in self.nodes:
-			if self.dist(self.goalNode.pos, p.pos) <= envr.GOAL_RADIUS:
-				nearGoal.append(p)
-		return nearGoal
+		return self.index.near(self.goal, envr.GOAL_RADIUS)
 
 	def getBestnode(self):
 		"""
 		find the node near goal region with min path cost from start region
 		"""
 		nearGoal = self.getNeargoal()
-		minCost = float('inf')
-		minNode = None
-		for p in nearGoal:
-			if p.cost < minCost:
-				minCost = p.cost
-				minNode = p
+		if len(nearGoal) == 0:
+			return None
+
+		return nearGoal[int(np.argmin(self.tree.cost[nearGoal]))]
+
+
+	def getBest(self, nodes):
+		"""
+		return the node in the goal region among nodes with the lowest
+		cost of the path through it to the goal and that cost,
+		(None, inf) if no node is in the goal region
+		"""
+		nodes = np.array(nodes, dtype = np.int64)
+		if len(nodes) == 0:
+			return None, float('inf')
+
+		positions = self.tree.pos[nodes]
+		toGoal = np.hypot(positions[:, 0] - self.goal[0], positions[:, 1] - self.goal[1])
+		costs = self.tree.cost[nodes] + toGoal
+		costs[toGoal > envr.GOAL_RADIUS] = float('inf')
+
+		i = np.argmin(costs)
+		if costs[i] == float('inf'):
+			return None, float('inf')
+		return int(nodes[i]), float(costs[i])
+
+	def resetBest(self):
+		"""
+		search bestNode again in the whole goal region, needed when
+		the cost of nodes was raised or nodes were removed
+		"""
+		self.bestNode, self.bestCost = self.getBest(self.getNeargoal())
+
+	def updateBest(self, nodes):
+		"""
+		update bestNode and bestCost, the cost of the path through it
+		to the goal, with the nodes in the goal region among the new or
+		changed nodes. Return True if the best path got cheaper
+		"""
+		node, cost = self.getBest(nodes)
+		if cost < self.bestCost:
+			self.bestNode = node
+			self.bestCost = cost
+			self.observer.costImproved(self.count, self.bestCost)
+			if self.informed:
+				self.inform()
+			return True
+
+		return False
+
+	def inform(self):
+		"""
+		restrict the informed sampler to the ellipse of bestCost and
+		prune the tree once the cost dropped enough since the last prune
+		"""
+		self.sampler.cBest = self.bestCost
+		self.freePoints = []
+		if self.bestCost < self.pruneCost*(1 - PRUNE_RATIO):
+			self.pruneCost = self.bestCost
+			self.prune()
+
+	def prune(self):
+		"""
+		remove every node x with |x - start| + |x - goal| > bestCost,
+		no path through it can be cheaper than the best path, together
+		with its subtree. The tree is compacted and the nearest neighbour
+		index is built again
+		"""
+		remove = self.sampler.heuristic(self.tree.getPositions()) > self.bestCost + PRUNE_TOLERANCE
+		remove[0] = False
+		if not remove.any():
+			return
 
-		return minNode
+		parent = self.tree.parent[:len(self.tree)]
+		for p in np.nonzero(remove)[0].tolist():
+			if not remove[parent[p]]:
+				remove[self.tree.getSubtree(p)] = True
 
+		self.prunedCount += int(np.count_nonzero(remove))
+		self.removeNodes(remove)
+
+	def removeNodes(self, remove):
+		"""
+		remove the nodes where the bool array remove is True, the
+		subtree of every removed node has to be removed too. The tree
+		is compacted, the nearest neighbour index is built again and
+		the array mapping old to new node indexes is returned
+		"""
+		parent = self.tree.parent
+		for p in np.nonzero(remove)[0].tolist():
+			self.observer.removeEdge(self.tree.getPos(parent[p]), self.tree.getPos(p))
+
+		newIndex = self.tree.compact(~remove)
+		self.batchPoints = []
+		self.changedNodes = [int(newIndex[p]) for p in self.changedNodes if newIndex[p] != -1]
+		if self.bestNode != None:
+			self.bestNode = int(newIndex[self.bestNode])
+			if self.bestNode == -1:
+				self.resetBest()
+
+		self.index = spatial.makeIndex(self.indexKind, delta)
+		self.index.insertMany(self.tree.getPositions(), np.arange(len(self.tree)))
+		return newIndex
+
+	def validatePath(self, node):
+		"""
+		check the edges on the path from the root to node which were
+		not checked for obstacles yet, every blocked edge is repaired.
+		Return the index of node with a free path, None if node was
+		removed by a repair
+		"""
+		while True:
+			edges = []
+			n = node
+			while self.tree.parent[n] != -1:
+				if not self.tree.checked[n]:
+					edges.append(n)
+				n = self.tree.parent[n]
+
+			repaired = False
+			for n in reversed(edges):
+				self.edgeChecks += 1
+				if self.obstacleSet.edgeCollide(self.tree.getPos(self.tree.parent[n]), self.tree.getPos(n)):
+					newIndex = self.repair(n)
+					if newIndex is not None:
+						node = int(newIndex[node])
+						if node == -1:
+							return None
+					repaired = True
+					break
+
+				self.tree.checked[n] = True
+
+			if not repaired:
+				return node
+
+	def repair(self, node):
+		"""
+		the edge from the parent of node to node is blocked, move node
+		below the near node with the lowest cost whose edge to node is
+		free and which is not in the subtree of node. If there is none
+		node and its subtree are removed and the array mapping old to
+		new node indexes is returned, else None
+		"""
+		self.repairCount += 1
+		pos = self.tree.getPos(node)
+		subtree = [node] + self.tree.getSubtree(node)
+		nearNodes = self.getNearnodes(pos)
+		nearNodes = nearNodes[~np.isin(nearNodes, subtree)]
+
+		positions = self.tree.pos[nearNodes]
+		clist = self.tree.cost[nearNodes] + np.hypot(positions[:, 0] - pos[0], positions[:, 1] - pos[1])
+		for i in np.argsort(clist).tolist():
+			p = int(nearNodes[i])
+			self.edgeChecks += 1
+			if not self.obstacleSet.edgeCollide(self.tree.getPos(p), pos):
+				self.observer.rewire(self.tree.getPos(self.tree.parent[node]), self.tree.getPos(p), pos)
+				self.tree.setParent(node, p)
+				self.tree.checked[node] = True
+				self.maxEdge = max(self.maxEdge, clist[i] - self.tree.cost[p])
+				self.propagateCost(node, self.tree.cost[node] - clist[i])
+				return None
+
+		remove = np.zeros(len(self.tree), dtype = bool)
+		remove[subtree] = True
+		return self.removeNodes(remove)
+
+	def getValidbest(self):
+		"""
+		return bestNode after the edges of its path are checked, in
+		deferred mode a repair can raise costs so the best node is
+		searched again until its path needs no repair
+		"""
+		if self.check != 'deferred':
+			return self.bestNode
+
+		while self.bestNode != None:
+			repairs = self.repairCount
+			node = self.validatePath(self.bestNode)
+			if self.repairCount == repairs:
+				return node
+			self.resetBest()
+		return None
+
+	def addObstacle(self, obs):
+		"""
+		add obstacle obs while planning, only the subtrees below the
+		edges it blocks are removed
+		"""
+		self.obstacleSet.obstacles.append(obs)
+		self.obstacleSet.changed()
+		self.update([obs])
+
+	def removeObstacle(self, obs):
+		"""
+		remove obstacle obs while planning, the tree stays valid
+		"""
+		self.obstacleSet.obstacles.remove(obs)
+		self.obstacleSet.changed()
+		self.update([])
+
+	def moveObstacle(self, obs, dx, dy):
+		"""
+		move obstacle obs by dx, dy while planning, only the subtrees
+		below the edges blocked at its new position are removed
+		"""
+		obs.move(dx, dy)
+		self.obstacleSet.changed()
+		self.update([obs])
+
+	def update(self, obstacles):
+		"""
+		update the planner after the obstacle set changed, obstacles is
+		the list of new or moved obstacles which can block edges
+		"""
+		self.sampler.setSpace(sampler.getFreeSpace(self.obstacleSet))
+		self.freePoints = []
+		self.batchPoints = []
+		if obstacles:
+			self.invalidate(obstacles)
+		self.resetBest()
+
+	def invalidate(self, obstacles):
+		"""
+		remove every node whose edge from its parent is blocked by one
+		of obstacles together with its subtree. Every edge is kept with
+		its child node in the nearest neighbour index and is not longer
+		than maxEdge, so only the nodes near the box around obstacles
+		are checked. Return the number of removed nodes
+		"""
+		changed = collision.ObstacleSet(obstacles)
+		x0, y0, x1, y1 = changed.bounds()
+		centre = (x0 + x1)/2.0, (y0 + y1)/2.0
+		nodes = np.array(self.index.near(centre, math.hypot(x1 - x0, y1 - y0)/2 + self.maxEdge), dtype = np.int64)
+		nodes = nodes[self.tree.parent[nodes] != -1]
+		if len(nodes) == 0:
+			return 0
+
+		blocked = nodes[changed.segmentsCollide(self.tree.pos[self.tree.parent[nodes]], self.tree.pos[nodes])]
+		if len(blocked) == 0:
+			return 0
+
+		remove = np.zeros(len(self.tree), dtype = bool)
+		for n in blocked.tolist():
+			if not remove[n]:
+				remove[n] = True
+				remove[self.tree.getSubtree(n)] = True
+
+		self.removeNodes(remove)
+		return int(np.count_nonzero(remove))
+
+	def replan(self):
+		"""
+		continue the search on the remaining tree after the obstacles
+		changed, return the path and the tree like plan. A path which
+		is still free is returned without growing the tree
+		"""
+		return self.plan()
+
+	def cancel(self):
+		"""
+		stop a running anytime search after the current iteration,
+		can be called from another thread
+		"""
+		self.cancelled = True
+
+	def anytime(self, budget):
+		"""
+		Anytime search for budget seconds of wall clock time. This is a
+		generator which yields (path, cost) every time a cheaper path
+		to the goal is found, so the caller always holds the best path
+		so far. It stops when the budget is over, after MAX_ITER
+		iterations or when cancel is called
+		"""
+		deadline = time.time() + budget
+		self.count = 0
+		self.cancelled = False
+
+		while not self.cancelled and self.count < self.MAX_ITER and time.time() < deadline:
+			self.count += 1
+			newNode = self.getNext()
+
+			if self.updateBest([newNode] + self.changedNodes):
+				if self.goalCount == None:
+					self.goalCount = self.count
+					self.observer.goalReached(self.count)
+				bestNode = self.getValidbest()
+				if bestNode != None:
+					yield self.getPath(bestNode), self.bestCost
+
+			self.observer.iteration(self.count)
+
+		bestNode = self.getValidbest()
+		if bestNode != None:
+			self.observer.pathFound(self.getPath(bestNode))
+
+	def getPath(self, node):
+		"""
+		Return the list of positions from start to given node
+		and on to the goal
+		"""
+		path = self.tree.getPath(node)
+		if path[-1] != tuple(self.goal):
+			path.append(self.goal)
+		return path
+
+	def plan(self):
+		"""
+		Search the path without touching the pygame screen, every
+		drawing is left to the observer. Return the path from start
+		to goal as list of positions (None if not found) and the
+		tree
+		"""
+		self.count = 0
+
+		if not self.iter_limit and self.bestNode != None:
+			# a warm started tree can already reach the goal region
+			bestNode = self.getValidbest()
+			if bestNode != None:
+				if self.goalCount == None:
+					self.goalCount = 0
+					self.observer.goalReached(0)
+				path = self.getPath(bestNode)
+				self.observer.pathFound(path)
+				return path, self.tree
+
+		while True:
+			self.count += 1
+
+			if self.count < self.MAX_ITER:
+				newNode = self.getNext()
+				reached = self.checkGoal(self.tree.getPos(newNode))
+
+				if reached and self.check == 'deferred' and not self.iter_limit:
+					newNode = self.validatePath(newNode)
+					reached = newNode != None
+
+				if reached and self.goalCount == None:
+					self.goalCount = self.count
+					self.observer.goalReached(self.count)
+
+				if reached and not self.iter_limit:
+					bestNode = newNode
+					break
+
+				if self.iter_limit:
+					self.updateBest([newNode] + self.changedNodes)
+
+			elif self.iter_limit:
+				bestNode = self.getValidbest()
+				if bestNode == None:
+					return None, self.tree
+
+				break
+
+			else:
+				return None, self.tree
+
+			self.observer.iteration(self.count)
+
+		path = self.getPath(bestNode)
+		self.observer.pathFound(path)
+		return path, self.tree
 
 	def run(self):
 		"""
@@ -244,47 +752,9 @@ class RRTStar():
 			find the path with lowest cost
 			return path
 		"""
+		path, tree = self.plan()
+		if path == None:
+			print("Maximum Number of Iteration Reached")
+			return
 
-		self.currentState = 'solving'
-		self.count = 0
-
-		while True:
-
-			envr.screenUpdate()
-
-			if self.currentState == 'solving':
-				self.count += 1
-
-				if self.count < self.MAX_ITER:
-					newNode = self.getNext()
-					self.nodes.append(newNode)
-					envr.drawPath(newNode.parent.pos, newNode.pos, envr.cyan)
-
-					if self.checkGoal(newNode) and not self.iter_limit:
-						self.currentState = 'solved'
-						self.goalNode.parent = newNode
-
-				elif self.iter_limit:
-					self.currentState = 'solved'
-					bestNode = self.getBestnode()
-					if bestNode == None:
-						print("Maximum Number of Iteration Reached")
-
-					self.goalNode.parent = bestNode				
-
-				else:
-					print("Maximum Number of Iteration Reached")
-					return
-
-			elif self.currentState == 'solved':
-				currNode = self.goalNode
-				pygame.display.set_caption('Found the path')
-
-				while currNode.parent != None:
-					envr.drawPath(currNode.pos,currNode.parent.pos, envr.red, 6)
-					currNode = currNode.parent
-
-			for e in pygame.event.get():
-				if e.type == pygame.QUIT or (e.type == pygame.KEYUP and e.key == pygame.K_ESCAPE):
-					sys.exit("Initiated Exit")
-
+		self.observer.wait()
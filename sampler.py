@@ -0,0 +1,264 @@
+"""
+Author - Rajnish Tiwari
+
+Sampling of random points in free space. Instead of drawing points
+over the whole screen and rejecting the ones inside obstacles the
+screen is divided once into square cells which are marked as free,
+blocked or mixed. Points are drawn in vectorized batches directly
+from the free and mixed cells, only points falling in mixed cells
+are checked against the obstacles.
+
+UniformSampler     - uniform over free space
+GoalBiasedSampler  - uniform, but returns the goal with probability bias
+HaltonSampler      - low discrepancy Halton sequence mapped to free space
+InformedSampler    - once a path of cost cBest is known only points in
+                     the ellipse which can lie on a shorter path
+"""
+
+import numpy as np
+import envr
+import spatial
+import collision
+
+CELL_SIZE = 5.0 # side of the cells of the free space raster
+
+
+class FreeSpace():
+	"""
+	Raster of the XDIM x YDIM window built from an ObstacleSet, only
+	cells which are not completely covered by an obstacle are kept
+	"""
+	def __init__(self, obstacleSet, XDIM = envr.XDIM, YDIM = envr.YDIM, cellSize = CELL_SIZE):
+		self.obstacleSet = obstacleSet
+		self.XDIM = XDIM
+		self.YDIM = YDIM
+		xs = np.arange(0, XDIM, cellSize, dtype = np.float64)
+		ys = np.arange(0, YDIM, cellSize, dtype = np.float64)
+		self.cellSize = cellSize
+		self.nx = len(xs)
+		self.ny = len(ys)
+		x0, y0 = [a.ravel() for a in np.meshgrid(xs, ys)]
+		x1 = np.minimum(x0 + cellSize, XDIM)
+		y1 = np.minimum(y0 + cellSize, YDIM)
+
+		touched, covered = self.classify(x0, y0, x1, y1)
+
+		keep = ~covered
+		self.corner = np.column_stack((x0[keep], y0[keep]))
+		self.size = np.column_stack((x1[keep] - x0[keep], y1[keep] - y0[keep]))
+		self.mixed = touched[keep]
+		self.cumArea = np.cumsum(self.size[:, 0]*self.size[:, 1])
+		self.area = self.cumArea[-1] if len(self.cumArea) else 0.0
+
+		if len(self.cumArea) == 0:
+			raise ValueError('no free space left between the obstacles')
+
+	def classify(self, x0, y0, x1, y1):
+		"""
+		return for every cell if it touches any obstacle and if it is
+		completely covered by one obstacle, each obstacle is only
+		tested against the cells under the box around it
+		"""
+		touched = np.zeros(len(x0), dtype = bool)
+		covered = np.zeros(len(x0), dtype = bool)
+		obstacles = self.obstacleSet
+
+		i, c = self.boxCells(obstacles.rects)
+		rx0, ry0, rx1, ry1 = obstacles.rects[i].T
+		touched[c[(x0[c] < rx1) & (x1[c] > rx0) & (y0[c] < ry1) & (y1[c] > ry0)]] = True
+		covered[c[(rx0 < x0[c]) & (x1[c] < rx1) & (ry0 < y0[c]) & (y1[c] < ry1)]] = True
+
+		i, c = self.boxCells(obstacles.boxes()[1])
+		cx, cy, r = obstacles.circles[i].T
+		# distance from centre to the closest and to the farthest point of the cell
+		nx = np.clip(cx, x0[c], x1[c]) - cx
+		ny = np.clip(cy, y0[c], y1[c]) - cy
+		fx = np.maximum(abs(x0[c] - cx), abs(x1[c] - cx))
+		fy = np.maximum(abs(y0[c] - cy), abs(y1[c] - cy))
+		touched[c[nx**2 + ny**2 <= r**2]] = True
+		covered[c[fx**2 + fy**2 <= r**2]] = True
+
+		# only the box around a polygon is known here, its points are checked
+		i, c = self.boxCells(obstacles.polygons)
+		px0, py0, px1, py1 = obstacles.polygons[i].T
+		touched[c[(x0[c] < px1) & (x1[c] > px0) & (y0[c] < py1) & (y1[c] > py0)]] = True
+
+		# cells which the segment of a line crosses once grown by half its width
+		i, c = self.boxCells(obstacles.boxes()[3])
+		lx, ly, lx1, ly1, r = obstacles.lines[i].T
+		grown = np.column_stack((x0[c] - r, y0[c] - r, x1[c] + r, y1[c] + r))
+		touched[c[collision.segmentsInRects(lx, ly, lx1 - lx, ly1 - ly, grown)]] = True
+
+		if len(obstacles.others):
+			# shape of other obstacles is unknown, check every point
+			touched[:] = True
+
+		return touched, covered
+
+	def boxCells(self, boxes):
+		"""
+		return (box, cell) of every cell of the raster under each of the
+		(x min, y min, x max, y max) boxes
+		"""
+		lo = np.maximum(np.floor(boxes[:, :2]/self.cellSize), 0).astype(np.intp)
+		hi = np.minimum(np.floor(boxes[:, 2:]/self.cellSize), [self.nx - 1, self.ny - 1]).astype(np.intp)
+		# rows of the raster run along x, so the roles of x and y are swapped
+		return spatial.coveredCells(lo[:, 1], lo[:, 0], hi[:, 1], hi[:, 0], self.nx)
+
+	def getPoints(self, u):
+		"""
+		map the (N,3) array u of numbers in [0,1) to points in the
+		kept cells, the first column chooses the cell weighted by its
+		area and the others the position inside the cell, points
+		inside obstacles are dropped
+		"""
+		cell = np.searchsorted(self.cumArea, u[:, 0]*self.cumArea[-1], side = 'right')
+		cell = np.minimum(cell, len(self.cumArea) - 1)
+		points = self.corner[cell] + u[:, 1:]*self.size[cell]
+
+		free = np.ones(len(points), dtype = bool)
+		check = self.mixed[cell]
+		if check.any():
+			free[check] = ~self.obstacleSet.collides(points[check])
+		return points[free]
+
+
+class UniformSampler():
+	"""
+	points uniformly distributed over free space
+	"""
+	def __init__(self, space, goal):
+		self.space = space
+		self.goal = goal
+
+	def setSpace(self, space):
+		"""
+		draw the points from space, used when the obstacles changed
+		"""
+		self.space = space
+
+	def sample(self, n):
+		"""
+		return (k,2) array of at most n free points
+		"""
+		return self.space.getPoints(np.random.random((n, 3)))
+
+
+class GoalBiasedSampler(UniformSampler):
+	"""
+	uniform points where each one is replaced by the goal with
+	probability bias
+	"""
+	def __init__(self, space, goal, bias = 0.05):
+		UniformSampler.__init__(self, space, goal)
+		self.bias = bias
+
+	def sample(self, n):
+		points = UniformSampler.sample(self, n)
+		points[np.random.random(len(points)) < self.bias] = self.goal
+		return points
+
+
+def halton(index, base):
+	"""
+	return the radical inverse of every integer of index in given base
+	"""
+	index = np.array(index, dtype = np.int64)
+	result = np.zeros(len(index), dtype = np.float64)
+	f = 1.0/base
+	while index.any():
+		result += f*(index % base)
+		index //= base
+		f /= base
+	return result
+
+
+class HaltonSampler(UniformSampler):
+	"""
+	points of the 3 dimensional Halton sequence (bases 2, 3 and 5)
+	mapped to free space, the sequence is shifted by a random offset
+	so different seeds give different point sets
+	"""
+	def __init__(self, space, goal):
+		UniformSampler.__init__(self, space, goal)
+		self.index = 1
+		self.shift = np.random.random(3)
+
+	def sample(self, n):
+		index = np.arange(self.index, self.index + n)
+		self.index += n
+		u = np.column_stack([halton(index, b) for b in (2, 3, 5)])
+		return self.space.getPoints((u + self.shift) % 1.0)
+
+
+class InformedSampler():
+	"""
+	Informed sampling of RRT*. While cBest, the cost of the best path
+	found, is infinite the points of the base sampler are returned.
+	Afterwards only points x with |x - start| + |x - goal| < cBest can
+	improve the path, they form the ellipse with foci start and goal
+	whose major axis is cBest, and points are drawn uniformly from it
+	"""
+	def __init__(self, base, start, goal):
+		self.base = base
+		self.space = base.space
+		self.start = np.array(start, dtype = np.float64)
+		self.goal = np.array(goal, dtype = np.float64)
+		self.centre = (self.start + self.goal)/2
+		self.cMin = np.hypot(*(self.goal - self.start))
+		angle = np.arctan2(self.goal[1] - self.start[1], self.goal[0] - self.start[0])
+		self.rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+		self.cBest = float('inf')
+
+	def setSpace(self, space):
+		self.space = space
+		self.base.setSpace(space)
+
+	def heuristic(self, points):
+		"""
+		lower bound of the cost of a path from start to goal through
+		each of the (N,2) points
+		"""
+		return (np.hypot(points[:, 0] - self.start[0], points[:, 1] - self.start[1]) +
+				np.hypot(points[:, 0] - self.goal[0], points[:, 1] - self.goal[1]))
+
+	def sample(self, n):
+		if self.cBest == float('inf'):
+			return self.base.sample(n)
+
+		a = self.cBest/2
+		b = np.sqrt(max(self.cBest**2 - self.cMin**2, 0.0))/2
+		if np.pi*a*b >= self.space.area:
+			# the ellipse is larger than the free space, filter the base samples
+			points = self.base.sample(n)
+			return points[self.heuristic(points) < self.cBest]
+
+		r = np.sqrt(np.random.random(n))
+		theta = 2*np.pi*np.random.random(n)
+		points = np.column_stack((a*r*np.cos(theta), b*r*np.sin(theta))).dot(self.rotation.T) + self.centre
+
+		inside = ((points[:, 0] >= 0) & (points[:, 0] < self.space.XDIM) &
+				(points[:, 1] >= 0) & (points[:, 1] < self.space.YDIM))
+		points = points[inside]
+		return points[~self.space.obstacleSet.collides(points)]
+
+
+SAMPLERS = {'uniform': UniformSampler, 'goal': GoalBiasedSampler, 'halton': HaltonSampler}
+
+def getFreeSpace(obstacleSet, XDIM = envr.XDIM, YDIM = envr.YDIM):
+	"""
+	return the free space raster of obstacleSet, it is built once and
+	kept with the obstacle set so every planner using the same set
+	shares it
+	"""
+	key = (XDIM, YDIM)
+	if obstacleSet.freeSpace == None or obstacleSet.freeSpace[0] != key:
+		obstacleSet.freeSpace = key, FreeSpace(obstacleSet, XDIM, YDIM)
+	return obstacleSet.freeSpace[1]
+
+def makeSampler(kind, obstacleSet, goal, XDIM = envr.XDIM, YDIM = envr.YDIM):
+	"""
+	create the sampler of given kind drawing points in the free
+	space of obstacleSet
+	"""
+	return SAMPLERS[kind](getFreeSpace(obstacleSet, XDIM, YDIM), goal)
@@ -0,0 +1,541 @@
+"""
+Author - Rajnish Tiwari
+
+Nearest neighbour indexes used by the motion planning algorithms
+to find the node of the tree which is closest to a sampled point,
+the k closest nodes in order of distance and all nodes which lie
+within some radius of a point.
+Every index stores (position, item) pairs, where the item is the
+index of the node in the tree, supports incremental insertion as
+nodes are appended to the tree and can be swapped with each other
+through makeIndex.
+
+LinearIndex - scan every stored point, reference for correctness
+GridIndex   - bucketed uniform grid, cell size taken from search step
+KDTree      - incremental 2d tree
+
+nearestMany finds the nearest nodes of a whole batch of points at once
+from the position array of the tree without any index.
+
+The indexes copy the coordinates of the stored points, reading them
+from the arrays of the tree in the python loops of the queries would
+be slower. The linear index takes about 25 bytes per point, the grid
+index about 45 and the kd-tree about 260 with one object per point.
+"""
+
+import heapq, math
+from array import array
+import numpy as np
+
+BATCH_CELL_NODES = 4 # mean number of nodes per cell of the grid built by nearestMany
+BATCH_COARSE = 8 # cells of that grid along each side of a cell of its coarse grid
+
+
+class LinearIndex():
+	"""
+	Reference index which scans every stored point for each query,
+	points and items are kept in compact arrays so items must be
+	integers such as the node indexes of tree.Tree
+	"""
+	def __init__(self, cellSize = None):
+		self.xs = array('d')
+		self.ys = array('d')
+		self.items = array('l')
+
+	def __len__(self):
+		return len(self.items)
+
+	def insert(self, pos, item):
+		"""
+		add item located at pos to the index
+		"""
+		self.xs.append(pos[0])
+		self.ys.append(pos[1])
+		self.items.append(item)
+
+	def insertMany(self, positions, items):
+		"""
+		add the items located at the (N,2) array positions to the index
+		at once, e.g. all nodes of a tree
+		"""
+		positions = np.asarray(positions, dtype = np.float64)
+		self.xs.frombytes(np.ascontiguousarray(positions[:, 0]).tobytes())
+		self.ys.frombytes(np.ascontiguousarray(positions[:, 1]).tobytes())
+		self.items.frombytes(np.asarray(items, dtype = self.items.typecode).tobytes())
+
+	def nearest(self, pos):
+		"""
+		return the stored item which is nearest to pos
+		"""
+		px, py = pos
+		bestItem = None
+		bestDist = float('inf')
+		for x, y, item in zip(self.xs, self.ys, self.items):
+			d = (x - px)**2 + (y - py)**2
+			if d < bestDist:
+				bestDist = d
+				bestItem = item
+		return bestItem
+
+	def kNearest(self, pos, k):
+		"""
+		return the k stored items which are nearest to pos in order of
+		their distance, all items if there are fewer
+		"""
+		px, py = pos
+		dists = [(x - px)**2 + (y - py)**2 for x, y in zip(self.xs, self.ys)]
+		slots = heapq.nsmallest(k, range(len(dists)), key = dists.__getitem__)
+		return [self.items[s] for s in slots]
+
+	def near(self, pos, r):
+		"""
+		return all stored items which are within r distance from pos
+		"""
+		px, py = pos
+		r2 = r*r
+		nearItems = []
+		for x, y, item in zip(self.xs, self.ys, self.items):
+			if (x - px)**2 + (y - py)**2 <= r2:
+				nearItems.append(item)
+		return nearItems
+
+
+class GridIndex(LinearIndex):
+	"""
+	Index which buckets the stored points into square cells of side
+	cellSize. A query only visits the rings of cells around the cell
+	of the query point which can hold a closer point than the best
+	one found so far, each cell holds the slots of its points in the
+	arrays of LinearIndex.
+	"""
+	def __init__(self, cellSize = 10.0):
+		LinearIndex.__init__(self)
+		self.cellSize = float(cellSize)
+		self.cells = {}
+		self.minCell = None
+		self.maxCell = None
+
+	def getCell(self, pos):
+		"""
+		return the cell which contains position pos
+		"""
+		return int(math.floor(pos[0]/self.cellSize)), int(math.floor(pos[1]/self.cellSize))
+
+	def insert(self, pos, item):
+		"""
+		add item located at pos to the index
+		"""
+		cell = self.getCell(pos)
+		if cell not in self.cells:
+			self.cells[cell] = array('l')
+		self.cells[cell].append(len(self.items))
+		LinearIndex.insert(self, pos, item)
+
+		if self.minCell == None:
+			self.minCell = cell
+			self.maxCell = cell
+		else:
+			self.minCell = min(self.minCell[0], cell[0]), min(self.minCell[1], cell[1])
+			self.maxCell = max(self.maxCell[0], cell[0]), max(self.maxCell[1], cell[1])
+
+	def insertMany(self, positions, items):
+		"""
+		add the items located at the (N,2) array positions to the index
+		at once, the points are sorted by cell so every cell is only
+		visited once
+		"""
+		positions = np.asarray(positions, dtype = np.float64)
+		if len(positions) == 0:
+			return
+
+		first = len(self.items)
+		LinearIndex.insertMany(self, positions, items)
+		cells = np.floor(positions/self.cellSize).astype(np.int64)
+		order = np.lexsort((cells[:, 1], cells[:, 0]))
+		cells = cells[order]
+		starts = np.flatnonzero(np.any(cells[1:] != cells[:-1], axis = 1)) + 1
+		bounds = [0] + starts.tolist() + [len(order)]
+		slots = (order + first).astype(self.items.typecode)
+		for i, (x, y) in enumerate(cells[bounds[:-1]].tolist()):
+			if (x, y) not in self.cells:
+				self.cells[(x, y)] = array('l')
+			self.cells[(x, y)].frombytes(slots[bounds[i]:bounds[i + 1]].tobytes())
+
+		lo = tuple(cells.min(axis = 0).tolist())
+		hi = tuple(cells.max(axis = 0).tolist())
+		if self.minCell != None:
+			lo = min(self.minCell[0], lo[0]), min(self.minCell[1], lo[1])
+			hi = max(self.maxCell[0], hi[0]), max(self.maxCell[1], hi[1])
+		self.minCell = lo
+		self.maxCell = hi
+
+	def getRing(self, cell, k):
+		"""
+		return the cells which are exactly k cells away from cell
+		"""
+		cx, cy = cell
+		if k == 0:
+			return [cell]
+
+		ring = []
+		for x in range(cx - k, cx + k + 1):
+			ring.append((x, cy - k))
+			ring.append((x, cy + k))
+		for y in range(cy - k + 1, cy + k):
+			ring.append((cx - k, y))
+			ring.append((cx + k, y))
+		return ring
+
+	def nearest(self, pos):
+		"""
+		return the stored item which is nearest to pos
+		"""
+		if len(self.items) == 0:
+			return None
+
+		px, py = pos
+		cell = self.getCell(pos)
+		# rings beyond this one can not contain any stored point
+		maxRing = max(abs(cell[0] - self.minCell[0]), abs(cell[0] - self.maxCell[0]),
+					abs(cell[1] - self.minCell[1]), abs(cell[1] - self.maxCell[1]))
+
+		best = None
+		bestDist = float('inf')
+		visited = 0
+		for k in range(maxRing + 1):
+			# every point in ring k is at least (k-1)*cellSize away from pos
+			if k > 0 and ((k - 1)*self.cellSize)**2 > bestDist:
+				break
+
+			visited += 8*k + 1
+			if visited > len(self.items):
+				# sparse tree far from the query, scanning is cheaper
+				return LinearIndex.nearest(self, pos)
+
+			for c in self.getRing(cell, k):
+				for s in self.cells.get(c, ()):
+					d = (self.xs[s] - px)**2 + (self.ys[s] - py)**2
+					if d < bestDist:
+						bestDist = d
+						best = s
+
+		return self.items[best]
+
+	def kNearest(self, pos, k):
+		"""
+		return the k stored items which are nearest to pos in order of
+		their distance, rings of cells are visited until k points are
+		found which are closer than any point of the next ring
+		"""
+		if len(self.items) == 0:
+			return []
+
+		px, py = pos
+		cell = self.getCell(pos)
+		maxRing = max(abs(cell[0] - self.minCell[0]), abs(cell[0] - self.maxCell[0]),
+					abs(cell[1] - self.minCell[1]), abs(cell[1] - self.maxCell[1]))
+
+		found = []
+		visited = 0
+		for r in range(maxRing + 1):
+			visited += 8*r + 1
+			if visited > len(self.items):
+				return LinearIndex.kNearest(self, pos, k)
+
+			for c in self.getRing(cell, r):
+				for s in self.cells.get(c, ()):
+					found.append(((self.xs[s] - px)**2 + (self.ys[s] - py)**2, s))
+
+			# every point beyond ring r is at least r*cellSize away
+			if len(found) >= k and heapq.nsmallest(k, found)[-1][0] <= (r*self.cellSize)**2:
+				break
+
+		return [self.items[s] for d, s in heapq.nsmallest(k, found)]
+
+	def near(self, pos, r):
+		"""
+		return all stored items which are within r distance from pos,
+		only the cells overlapping the ball around pos are visited
+		"""
+		if len(self.items) == 0:
+			return []
+
+		lo = self.getCell((pos[0] - r, pos[1] - r))
+		hi = self.getCell((pos[0] + r, pos[1] + r))
+		lo = max(lo[0], self.minCell[0]), max(lo[1], self.minCell[1])
+		hi = min(hi[0], self.maxCell[0]), min(hi[1], self.maxCell[1])
+
+		if (hi[0] - lo[0] + 1)*(hi[1] - lo[1] + 1) > len(self.items):
+			# ball covers more cells than there are points
+			return LinearIndex.near(self, pos, r)
+
+		px, py = pos
+		r2 = r*r
+		nearItems = []
+		for x in range(lo[0], hi[0] + 1):
+			for y in range(lo[1], hi[1] + 1):
+				for s in self.cells.get((x, y), ()):
+					if (self.xs[s] - px)**2 + (self.ys[s] - py)**2 <= r2:
+						nearItems.append(self.items[s])
+		return nearItems
+
+
+class KDNode():
+    def __init__(self, pos, item, axis):
+        self.pos = pos
+        self.item = item
+        self.axis = axis
+        self.left = None
+        self.right = None
+
+class KDTree():
+	"""
+	Incremental 2d tree, each inserted point splits its region
+	alternately along x and y
+	"""
+	def __init__(self, cellSize = None):
+		self.root = None
+		self.size = 0
+
+	def __len__(self):
+		return self.size
+
+	def insert(self, pos, item):
+		"""
+		add item located at pos to the index
+		"""
+		self.size += 1
+		if self.root == None:
+			self.root = KDNode(pos, item, 0)
+			return
+
+		node = self.root
+		while True:
+			if pos[node.axis] < node.pos[node.axis]:
+				if node.left == None:
+					node.left = KDNode(pos, item, 1 - node.axis)
+					return
+				node = node.left
+			else:
+				if node.right == None:
+					node.right = KDNode(pos, item, 1 - node.axis)
+					return
+				node = node.right
+
+	def insertMany(self, positions, items):
+		"""
+		add the items located at the (N,2) array positions to the index,
+		one by one as every point needs its own node
+		"""
+		for pos, item in zip(np.asarray(positions).tolist(), np.asarray(items).tolist()):
+			self.insert(pos, item)
+
+	def nearest(self, pos):
+		"""
+		return the stored item which is nearest to pos
+		"""
+		if self.root == None:
+			return None
+
+		bestItem = None
+		bestDist = float('inf')
+		# each entry keeps a lower bound on the distance to its subtree
+		stack = [(self.root, 0.0)]
+		while stack:
+			node, bound = stack.pop()
+			if bound >= bestDist:
+				continue
+
+			d = (node.pos[0] - pos[0])**2 + (node.pos[1] - pos[1])**2
+			if d < bestDist:
+				bestDist = d
+				bestItem = node.item
+
+			diff = pos[node.axis] - node.pos[node.axis]
+			if diff < 0:
+				near, far = node.left, node.right
+			else:
+				near, far = node.right, node.left
+
+			# near side is popped first so the far side is usually skipped
+			if far != None:
+				stack.append((far, max(bound, diff*diff)))
+			if near != None:
+				stack.append((near, bound))
+
+		return bestItem
+
+	def kNearest(self, pos, k):
+		"""
+		return the k stored items which are nearest to pos in order of
+		their distance, all items if there are fewer
+		"""
+		# max heap of the k best (negative distance, count, item)
+		best = []
+		stack = [(self.root, 0.0)] if self.root != None else []
+		while stack:
+			node, bound = stack.pop()
+			if len(best) == k and bound >= -best[0][0]:
+				continue
+
+			d = (node.pos[0] - pos[0])**2 + (node.pos[1] - pos[1])**2
+			if len(best) < k:
+				heapq.heappush(best, (-d, len(best), node.item))
+			elif d < -best[0][0]:
+				heapq.heapreplace(best, (-d, best[0][1], node.item))
+
+			diff = pos[node.axis] - node.pos[node.axis]
+			if diff < 0:
+				near, far = node.left, node.right
+			else:
+				near, far = node.right, node.left
+			if far != None:
+				stack.append((far, max(bound, diff*diff)))
+			if near != None:
+				stack.append((near, bound))
+
+		return [item for d, c, item in sorted(best, reverse = True)]
+
+	def near(self, pos, r):
+		"""
+		return all stored items which are within r distance from pos,
+		subtrees lying completely outside the ball are skipped
+		"""
+		r2 = r*r
+		nearItems = []
+		stack = [self.root] if self.root != None else []
+		while stack:
+			node = stack.pop()
+			if (node.pos[0] - pos[0])**2 + (node.pos[1] - pos[1])**2 <= r2:
+				nearItems.append(node.item)
+
+			diff = pos[node.axis] - node.pos[node.axis]
+			if node.left != None and diff < r:
+				stack.append(node.left)
+			if node.right != None and diff >= -r:
+				stack.append(node.right)
+		return nearItems
+
+
+INDEX_TYPES = {'linear': LinearIndex, 'grid': GridIndex, 'kdtree': KDTree}
+
+def makeIndex(kind, cellSize):
+	"""
+	create the nearest neighbour index of given kind, cellSize is the
+	bucket size used by the grid index
+	"""
+	return INDEX_TYPES[kind](cellSize)
+
+
+def gatherRanges(order, start, lengths, per):
+	"""
+	return the concatenated order[start[i]:start[i] + lengths[i]] of all
+	ranges i and the array of i//per for every returned item
+	"""
+	total = int(lengths.sum())
+	owner = np.repeat(np.arange(len(start))//per, lengths)
+	offset = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+	return owner, order[np.repeat(start, lengths) + offset]
+
+
+def coveredCells(ix0, iy0, ix1, iy1, ny):
+	"""
+	return (box, cell) of every cell of a grid with ny rows in the
+	range of columns ix0 to ix1 and rows iy0 to iy1 of each box, cells
+	are numbered column*ny + row, empty ranges have first > last
+	"""
+	w = np.maximum(ix1 - ix0 + 1, 0)
+	h = np.maximum(iy1 - iy0 + 1, 0)
+	counts = w*h
+	owner = np.repeat(np.arange(len(ix0)), counts)
+	offset = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+	h = h[owner]
+	return owner, (ix0[owner] + offset//h)*ny + iy0[owner] + offset % h
+
+def closestOf(positions, points, owner, candidates, nearest, best):
+	"""
+	set nearest[k] and best[k] to the candidate closest to points[k]
+	and its squared distance, owner[i] is the point of candidate i and
+	owner is sorted. Only points which got a closer candidate change
+	"""
+	if len(candidates) == 0:
+		return
+
+	d = (positions[candidates, 0] - points[owner, 0])**2 + (positions[candidates, 1] - points[owner, 1])**2
+	counts = np.bincount(owner, minlength = len(points))
+	found = np.flatnonzero(counts)
+	d_min = np.minimum.reduceat(d, (np.cumsum(counts) - counts)[found])
+	better = d_min < best[found]
+	found, d_min = found[better], d_min[better]
+	best[found] = d_min
+	closest = np.flatnonzero(np.isin(owner, found) & (d == best[owner]))
+	nearest[owner[closest]] = candidates[closest]
+
+
+def nearestMany(positions, points):
+	"""
+	return the array of the indexes of the rows of the (N,2) array
+	positions which are nearest to each row of the (K,2) array points.
+	The positions are sorted into a grid of about BATCH_CELL_NODES per
+	cell and the 3x3 cells around each point are searched, the nearest
+	position found there is exact if it is at most one cell away. For
+	the remaining points, which lie away from the tree, a coarse grid is
+	searched in every cell which can hold a position closer than the
+	first position of the nearest cell
+	"""
+	positions = np.asarray(positions, dtype = np.float64)
+	points = np.asarray(points, dtype = np.float64).reshape(-1, 2)
+	n = len(positions)
+
+	lo = positions.min(axis = 0)
+	extent = positions.max(axis = 0) - lo
+	cell = max(math.sqrt(float(np.prod(extent + 1.0))*BATCH_CELL_NODES/n), 1e-9)
+	size = (extent/cell).astype(np.int64) + 1
+	cols = int(size[0]) + 2
+
+	def cellKeys(p):
+		# points outside the grid are moved onto the empty border cells
+		c = np.clip(((p - lo)/cell).astype(np.int64), -1, size) + 1
+		return c[:, 0] + c[:, 1]*cols
+
+	keys = cellKeys(positions)
+	order = np.argsort(keys)
+	keys = keys[order]
+
+	# the three cells of one row around a point are consecutive keys
+	around = cellKeys(points)[:, None] + np.array([-cols, 0, cols])
+	start = np.searchsorted(keys, around - 1, 'left').ravel()
+	lengths = np.searchsorted(keys, around + 1, 'right').ravel() - start
+
+	nearest = np.full(len(points), -1, dtype = np.int64)
+	best = np.full(len(points), np.inf)
+	owner, candidates = gatherRanges(order, start, lengths, 3)
+	closestOf(positions, points, owner, candidates, nearest, best)
+
+	far = np.flatnonzero(best > cell*cell)
+	if len(far) == 0:
+		return nearest
+
+	coarse = cell*BATCH_COARSE
+	c = (((positions - lo)/coarse).astype(np.int64)*[1, int(extent[0]/coarse) + 1]).sum(axis = 1)
+	order = np.argsort(c)
+	keys, first, counts = np.unique(c[order], return_index = True, return_counts = True)
+	cx = keys%(int(extent[0]/coarse) + 1)
+	cy = keys//(int(extent[0]/coarse) + 1)
+	x0 = lo[0] + cx*coarse
+	y0 = lo[1] + cy*coarse
+
+	q = points[far]
+	# lower bound of the distance to each coarse cell, upper bound from its first position
+	dx = np.maximum(np.maximum(x0 - q[:, 0:1], q[:, 0:1] - x0 - coarse), 0.0)
+	dy = np.maximum(np.maximum(y0 - q[:, 1:2], q[:, 1:2] - y0 - coarse), 0.0)
+	rep = positions[order[first]]
+	upper = ((rep[:, 0] - q[:, 0:1])**2 + (rep[:, 1] - q[:, 1:2])**2).min(axis = 1)
+	f, m = np.nonzero(dx**2 + dy**2 <= upper[:, None])
+
+	owner, candidates = gatherRanges(order, first[m], counts[m], 1)
+	farNearest = nearest[far]
+	farBest = best[far]
+	closestOf(positions, q, f[owner], candidates, farNearest, farBest)
+	nearest[far] = farNearest
+	return nearest
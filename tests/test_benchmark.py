@@ -0,0 +1,31 @@
+import json
+
+import benchmark
+
+
+def test_compare_flags_lost_solutions():
+	baseline = {'narrow/RRT*': {'success': 1.0, 'iter/s': 1000.0, 'first': 0.5, 'cost': 900.0}}
+	results = {'narrow/RRT*': {'success': 1/3.0, 'iter/s': 1000.0, 'first': None, 'cost': None}}
+	regressions = benchmark.compare(results, baseline, 0.1)
+	assert sorted(m for case, m, old, new in regressions) == ['cost', 'first', 'success']
+
+	assert benchmark.compare(baseline, baseline, 0.1) == []
+
+
+def test_success_rate_counts_failed_runs():
+	results = benchmark.runBenchmark(['narrow'], ['RRT'], 2, False, 5, memory = False)
+	assert results['narrow/RRT']['success'] == 0.0
+	assert results['narrow/RRT']['cost'] == None
+
+
+def test_profile_prints_phases_and_edge_cache(tmp_path, capsys):
+	path = str(tmp_path/'profile.json')
+	benchmark.main(['--scenario', 'random', '--planner', 'RRT*', '--repeat', '1', '--max-iter', '3000',
+					'--check', 'deferred', '--no-memory', '--profile', path])
+	out = capsys.readouterr().out
+	assert 'profile of random/RRT*' in out
+	assert 'edge cache' in out
+
+	with open(path) as f:
+		profile = json.load(f)['random/RRT*'][0]
+	assert profile['edge cache']['hits'] + profile['edge cache']['misses'] > 0
@@ -0,0 +1,68 @@
+import random
+import numpy as np
+import pytest
+
+import benchmark
+import envr
+import planners
+from birrt_star import BIRRTStar
+from test_rrt_star import pathCollides
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_replan_avoids_added_obstacle(seed):
+	obstacles, start, goal = benchmark.randomScenario(seed)
+	random.seed(seed)
+	np.random.seed(seed)
+	planner = BIRRTStar(start, goal, obstacles, False, max_iter = 4000)
+	path, trees = planner.plan()
+	assert path != None
+	assert not pathCollides(obstacles, path)
+
+	x, y = path[len(path)//2]
+	planner.addObstacle(envr.circle(envr.black, x, y, benchmark.DYNAMIC_RADIUS))
+	path, trees = planner.replan()
+	if path != None:
+		assert not pathCollides(planner.obstacleSet.obstacles, path)
+
+
+@pytest.mark.parametrize('check', ['eager', 'lazy'])
+def test_incremental_connection_matches_full_scan(check):
+	obstacles, start, goal = benchmark.randomScenario(0)
+	random.seed(0)
+	np.random.seed(0)
+	planner = BIRRTStar(start, goal, obstacles, True, check = check)
+
+	found = 0
+	for i in range(3000):
+		planner.count = i + 1
+		planner.grow(i % 2 == 0)
+		if i % 100 != 99:
+			continue
+
+		s, g = planner.getBestnodes()
+		if s == None:
+			assert planner.connection[0] == None
+			continue
+		found += 1
+		assert np.isclose(planner.connectionCost, planner.bridgeCost(s, g))
+		assert planner.bridgeFree(*planner.connection)
+	assert found > 0
+
+
+def test_parallel_returns_free_path_and_trees():
+	obstacles, start, goal = benchmark.randomScenario(0)
+	random.seed(0)
+	np.random.seed(0)
+	planner = BIRRTStar(start, goal, obstacles, True, max_iter = 2000, parallel = True)
+	path, trees = planner.plan()
+	assert path[0] == start and path[-1] == goal
+	assert not pathCollides(obstacles, path)
+	assert np.isclose(planner.getConnectionpath()[1], planners.pathCost(path))
+
+	# both workers ran to the end of their half of the iterations
+	assert [len(t) for t in trees] == [1001, 1001]
+	for tree in trees:
+		costs = tree.cost[:len(tree)].copy()
+		tree.computeCosts()
+		assert np.allclose(costs, tree.cost[:len(tree)])
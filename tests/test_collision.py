@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+import collision
+import envr
+import maps
+import sampler
+
+
+def makeObstacles(n, seed):
+	"""
+	n obstacles cycling through line, rectangle, circle, convex and
+	concave polygon at random places of the window
+	"""
+	rng = np.random.RandomState(seed)
+	obstacles = []
+	for i in range(n):
+		x, y = rng.rand(2)*[envr.XDIM - 100, envr.YDIM - 100] + 20
+		w, h = rng.rand(2)*50 + 5
+		kind = i % 5
+		if kind == 0:
+			obstacles.append(envr.line(envr.black, (x, y), (x + w, y - h), 1 + i % 7))
+		elif kind == 1:
+			obstacles.append(envr.rectangle(envr.black, x, y, w, h))
+		elif kind == 2:
+			obstacles.append(envr.circle(envr.black, x, y, h/2))
+		elif kind == 3:
+			obstacles.append(envr.polygon(envr.black, [(x, y), (x + w, y + h/3), (x + w/2, y + h)]))
+		else:
+			obstacles.append(envr.polygon(envr.black, [(x, y), (x + w, y), (x + w, y + h), (x + w/2, y + h/3),
+														(x, y + h)]))
+	return obstacles
+
+
+def box(obs):
+	if isinstance(obs, envr.circle):
+		return obs.x - obs.r, obs.y - obs.r, obs.x + obs.r, obs.y + obs.r
+	if isinstance(obs, envr.rectangle):
+		return obs.x, obs.y, obs.x + obs.width, obs.y + obs.height
+	if isinstance(obs, envr.line):
+		(x1, y1), (x2, y2), r = obs.pointi, obs.pointg, obs.width/2.0
+		return min(x1, x2) - r, min(y1, y2) - r, max(x1, x2) + r, max(y1, y2) + r
+	xs, ys = zip(*obs.points)
+	return min(xs), min(ys), max(xs), max(ys)
+
+
+def sampledHit(obstacles, p1, p2, step):
+	"""
+	check the segment by sampling points along it with isCollide of
+	every obstacle whose box it touches
+	"""
+	lo, hi = np.minimum(p1, p2), np.maximum(p1, p2)
+	near = [obs for obs in obstacles if np.all(lo <= box(obs)[2:]) and np.all(hi >= box(obs)[:2])]
+	n = int(np.hypot(*(p2 - p1))/step) + 2
+	for t in np.linspace(0.0, 1.0, n):
+		pos = p1 + t*(p2 - p1)
+		if any(obs.isCollide(pos) for obs in near):
+			return True
+	return False
+
+
+@pytest.mark.parametrize('count', [5, 80])
+def test_points_match_is_collide(count):
+	obstacles = makeObstacles(count, count)
+	obstacleSet = collision.ObstacleSet(obstacles)
+	checkers = [obstacleSet.shapes] + ([obstacleSet.hash] if obstacleSet.hash != None else [])
+
+	points = np.random.RandomState(1).rand(3000, 2)*[envr.XDIM, envr.YDIM]
+	expected = np.array([any(obs.isCollide(p) for obs in obstacles) for p in points])
+	assert expected.any()
+	assert (obstacleSet.collides(points) == expected).all()
+	for shapes in checkers:
+		assert (shapes.pointsHit(points) == expected).all()
+
+
+@pytest.mark.parametrize('count', [5, 80])
+def test_segments_match_sampled_is_collide(count):
+	obstacles = makeObstacles(count, count)
+	obstacleSet = collision.ObstacleSet(obstacles)
+	checkers = [obstacleSet.shapes] + ([obstacleSet.hash] if obstacleSet.hash != None else [])
+	if count == 80:
+		assert obstacleSet.hash != None
+
+	rng = np.random.RandomState(2)
+	p1 = rng.rand(800, 2)*[envr.XDIM, envr.YDIM]
+	p2 = p1 + rng.randn(800, 2)*12
+	results = [obstacleSet.segmentsCollide(p1, p2)] + [shapes.segmentsHit(p1, p2) for shapes in checkers]
+	for i in range(len(p1)):
+		hit = sampledHit(obstacles, p1[i], p2[i], 0.25)
+		# sampling can step over a corner the segment only grazes
+		if not hit and any(r[i] for r in results):
+			hit = sampledHit(obstacles, p1[i], p2[i], 0.001)
+		assert [bool(r[i]) for r in results] == [hit]*len(results)
+		assert obstacleSet.edgeCollide(p1[i], p2[i]) == hit
+	assert any(r.any() for r in results)
+
+
+def test_diagonal_line_blocks_points_and_segments():
+	# ends of the line in decreasing y, the wall is the segment grown by half its width
+	obstacles = maps.fromData([{'type': 'line', 'pointi': [100, 500], 'pointg': [500, 100], 'width': 6}])
+	obstacleSet = collision.ObstacleSet(obstacles)
+	assert obstacleSet.collide((300, 300))
+	assert obstacleSet.collide((302, 302))
+	assert not obstacleSet.collide((303, 303))
+	assert not obstacleSet.collide((50, 550))
+	assert obstacleSet.segmentCollide((200, 200), (400, 400))
+	assert not obstacleSet.segmentCollide((200, 200), (290, 290))
+
+	points = sampler.FreeSpace(obstacleSet).getPoints(np.random.RandomState(0).rand(20000, 3))
+	assert not any(obstacles[0].isCollide(p) for p in points)
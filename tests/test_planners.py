@@ -0,0 +1,42 @@
+import random
+import threading
+import time
+import numpy as np
+import pytest
+
+import benchmark
+import planners
+from test_rrt_star import pathCollides
+
+
+@pytest.mark.parametrize('name', ['RRT*', 'BI_RRT*'])
+@pytest.mark.parametrize('seed', range(4))
+def test_anytime_costs_never_increase(name, seed):
+	obstacles, start, goal = benchmark.randomScenario(seed)
+	random.seed(seed)
+	np.random.seed(seed)
+	results = list(planners.anytime(name, start, goal, obstacles, 60, max_iter = 4000))
+
+	costs = [cost for path, cost in results]
+	assert all(b <= a for a, b in zip(costs, costs[1:]))
+	for path, cost in results:
+		assert np.isclose(planners.pathCost(path), cost)
+		assert not pathCollides(obstacles, path)
+
+
+@pytest.mark.parametrize('name', ['RRT*', 'BI_RRT*'])
+def test_cancel_stops_anytime(name):
+	obstacles, start, goal = benchmark.randomScenario(0)
+	random.seed(0)
+	np.random.seed(0)
+	planner = planners.makePlanner(name, start, goal, obstacles, True, max_iter = 10**9)
+
+	# cancelled from another thread long before the budget or the iterations are over
+	timer = threading.Timer(0.5, planner.cancel)
+	begin = time.time()
+	timer.start()
+	results = list(planner.anytime(60))
+	timer.join()
+	assert time.time() - begin < 30
+	assert planner.cancelled and planner.count < 10**9
+	assert all(not pathCollides(obstacles, path) for path, cost in results)
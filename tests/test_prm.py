@@ -0,0 +1,27 @@
+import random
+import numpy as np
+import pytest
+
+import benchmark
+import collision
+from prm import PRMStar
+from test_rrt_star import pathCollides
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_queries_share_roadmap_and_return_free_paths(lazy):
+	obstacles, start, goal = benchmark.clutteredScenario(2)
+	random.seed(2)
+	np.random.seed(2)
+	obstacleSet = collision.ObstacleSet(obstacles)
+
+	path, roadmap = PRMStar(start, goal, obstacleSet, lazy = lazy).plan()
+	assert path[0] == start and path[-1] == goal
+	assert not pathCollides(obstacles, path)
+
+	# the second query only connects its ends to the roadmap already built
+	other = PRMStar(goal, start, obstacleSet, lazy = lazy)
+	path, again = other.plan()
+	assert again is roadmap
+	assert path[0] == goal and path[-1] == start
+	assert not pathCollides(obstacles, path)
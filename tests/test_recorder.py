@@ -0,0 +1,59 @@
+import os
+import random
+import numpy as np
+import pytest
+
+import benchmark
+import maps
+import planners
+import recorder
+import replay
+
+
+def replayedEdges(events):
+	"""
+	parent position of every child position after applying the edge
+	events of the log in order
+	"""
+	parents = {}
+	for code, values in events:
+		if code == recorder.ADD_EDGE:
+			parents[values[2:]] = values[:2]
+		elif code == recorder.REWIRE:
+			assert parents[values[4:]] == values[:2]
+			parents[values[4:]] = values[2:4]
+		elif code == recorder.REMOVE_EDGE:
+			assert parents.pop(values[2:]) == values[:2]
+	return parents
+
+
+def rounded(pos):
+	return tuple(np.float32(pos).tolist())
+
+
+@pytest.mark.parametrize('name', ['RRT', 'RRT*'])
+def test_log_gives_back_tree_and_path(name, tmp_path):
+	obstacles, start, goal = benchmark.randomScenario(0)
+	random.seed(0)
+	np.random.seed(0)
+	log = str(tmp_path/'run.events')
+	observer = recorder.Recorder(log, obstacles, start, goal)
+	path, tree = planners.plan(name, start, goal, obstacles, True, max_iter = 3000, observer = observer)
+	observer.close()
+	assert path != None
+
+	header, events = recorder.load(log)
+	assert header['obstacles'] == maps.toData(obstacles)
+	assert tuple(header['start']) == start and tuple(header['goal']) == goal
+
+	positions = tree.getPositions()
+	expected = dict((rounded(positions[i]), rounded(positions[tree.parent[i]])) for i in range(1, len(tree)))
+	assert replayedEdges(events) == expected
+	paths = [values for code, values in events if code == recorder.PATH_FOUND]
+	assert paths == [[rounded(pos) for pos in path]]
+
+	# a frame every 100 iterations, on reaching the goal and for the path
+	saves = [code for code, values in events if code == recorder.GOAL_REACHED or code == recorder.PATH_FOUND or
+			(code == recorder.ITERATION and values[0] % 100 == 0)]
+	frames = replay.replay(log, str(tmp_path/'frames'), 100)
+	assert frames == len(saves) == len(os.listdir(str(tmp_path/'frames')))
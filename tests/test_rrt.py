@@ -0,0 +1,23 @@
+import random
+import numpy as np
+import pytest
+
+import benchmark
+from rrt import RRT
+from test_rrt_star import pathCollides
+
+
+@pytest.mark.parametrize('seed', range(6))
+@pytest.mark.parametrize('kwargs', [{'index': 'linear', 'sample': 'halton'}, {}, {'batch': 16}])
+def test_path_edges_are_free(seed, kwargs):
+	# single steps used to check only the new node, so edges cut the wall corners
+	obstacles, start, goal = benchmark.narrowScenario(seed)
+	random.seed(seed)
+	np.random.seed(seed)
+	path, tree = RRT(start, goal, obstacles, **kwargs).plan()
+	if path != None:
+		assert not pathCollides(obstacles, path)
+
+	positions = tree.getPositions()
+	parent = tree.parent[1:len(tree)]
+	assert not RRT(start, goal, obstacles).obstacleSet.segmentsCollide(positions[parent], positions[1:]).any()
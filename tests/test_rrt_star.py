@@ -0,0 +1,74 @@
+import random
+import numpy as np
+import pytest
+
+import benchmark
+import envr
+from rrt_star import RRTStar
+
+
+def pathCollides(obstacles, path, step = 0.25):
+	"""
+	check the path by sampling points along every edge with isCollide
+	of each obstacle
+	"""
+	for p1, p2 in zip(path[:-1], path[1:]):
+		n = int(np.hypot(p2[0] - p1[0], p2[1] - p1[1])/step) + 2
+		for t in np.linspace(0.0, 1.0, n):
+			pos = (p1[0] + t*(p2[0] - p1[0]), p1[1] + t*(p2[1] - p1[1]))
+			if any(obs.isCollide(pos) for obs in obstacles):
+				return True
+	return False
+
+
+def test_deferred_repair_removing_nodes_returns_free_path():
+	# expansion only adds free edges, so an obstacle the unchecked edges
+	# never saw is put on a node of the path, no near node reaches it
+	# through a free edge and the repair removes its subtree
+	obstacles, start, goal = benchmark.narrowScenario(9)
+	random.seed(9)
+	np.random.seed(9)
+	planner = RRTStar(start, goal, obstacles, False, max_iter = 8000, check = 'deferred')
+	path, tree = planner.plan()
+	assert path != None
+
+	removed = []
+	removeNodes = planner.removeNodes
+	def countRemoved(remove):
+		removed.append(int(np.count_nonzero(remove)))
+		return removeNodes(remove)
+	planner.removeNodes = countRemoved
+
+	x, y = path[len(path)//2]
+	planner.obstacleSet.obstacles.append(envr.circle(envr.black, x, y, 3))
+	planner.obstacleSet.changed()
+	tree.checked[:len(tree)] = False
+
+	path, tree = planner.replan()
+	assert sum(removed) > 0
+	assert path != None
+	assert path[0] == start
+	assert not pathCollides(planner.obstacleSet.obstacles, path)
+
+
+@pytest.mark.parametrize('check', ['eager', 'lazy', 'deferred'])
+@pytest.mark.parametrize('informed', [False, True])
+def test_rewired_costs_and_children_match_parents(check, informed):
+	obstacles, start, goal = benchmark.randomScenario(3)
+	random.seed(3)
+	np.random.seed(3)
+	planner = RRTStar(start, goal, obstacles, True, max_iter = 1500, check = check, informed = informed)
+	path, tree = planner.plan()
+	assert planner.rewireCount > 0
+
+	# propagateCost only visits the rewired subtrees, computeCosts sums every path again
+	n = len(tree)
+	costs = tree.cost[:n].copy()
+	tree.computeCosts()
+	assert np.allclose(costs, tree.cost[:n])
+
+	children = [[] for i in range(n)]
+	for i in range(n):
+		if tree.parent[i] != -1:
+			children[tree.parent[i]].append(i)
+	assert [sorted(tree.getChildren(i)) for i in range(n)] == children
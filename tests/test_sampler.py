@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+import collision
+import envr
+import sampler
+from test_collision import makeObstacles
+
+
+def checkPoints(obstacles, points):
+	assert len(points)
+	assert ((points >= 0) & (points < [envr.XDIM, envr.YDIM])).all()
+	assert not any(obs.isCollide(p) for obs in obstacles for p in points)
+
+
+@pytest.mark.parametrize('count', [5, 80])
+def test_free_space_points_are_free(count):
+	obstacles = makeObstacles(count, count)
+	space = sampler.FreeSpace(collision.ObstacleSet(obstacles))
+	checkPoints(obstacles, space.getPoints(np.random.RandomState(0).rand(3000, 3)))
+
+
+@pytest.mark.parametrize('kind', sorted(sampler.SAMPLERS) + ['informed'])
+def test_samples_are_free(kind):
+	obstacles = makeObstacles(80, 1)
+	obstacleSet = collision.ObstacleSet(obstacles)
+	start, goal = (20, 20), (900, 560)
+	np.random.seed(0)
+	if kind == 'informed':
+		s = sampler.InformedSampler(sampler.makeSampler('uniform', obstacleSet, goal), start, goal)
+		checkPoints(obstacles, s.sample(500))
+		# a small ellipse draws from the ellipse itself, a large one filters the base samples
+		for cBest in (1.05*s.cMin, 3*s.cMin):
+			s.cBest = cBest
+			points = s.sample(2000)
+			checkPoints(obstacles, points)
+			assert (s.heuristic(points) < cBest).all()
+	else:
+		s = sampler.makeSampler(kind, obstacleSet, goal)
+		for i in range(3):
+			points = s.sample(1000)
+			if kind == 'goal':
+				points = points[(points != goal).any(axis = 1)]
+			checkPoints(obstacles, points)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import spatial
+
+
+def distances(positions, pos, items):
+	return [float(np.hypot(*(positions[i] - pos))) for i in items]
+
+
+def pointSets():
+	"""
+	random point sets, the ones on an integer lattice have many points
+	at the same distance from a query
+	"""
+	rng = np.random.RandomState(0)
+	return [('empty', np.zeros((0, 2))),
+			('one', np.array([[40.0, 25.0]])),
+			('same', np.full((5, 2), 30.0)),
+			('lattice', rng.randint(0, 12, (300, 2))*5.0),
+			('random', rng.rand(2000, 2)*[950, 600]),
+			('cluster', rng.randn(500, 2)*3 + 400)]
+
+
+def queries(rng):
+	# inside the sets, on lattice points and far away from all points
+	return np.vstack((rng.rand(40, 2)*[950, 600], rng.randint(0, 12, (20, 2))*5.0, [[-500, -500], [3000, 50]]))
+
+
+@pytest.mark.parametrize('kind', ['grid', 'kdtree'])
+@pytest.mark.parametrize('bulk', [False, True])
+@pytest.mark.parametrize('name, positions', pointSets())
+def test_index_matches_linear(kind, bulk, name, positions):
+	reference = spatial.makeIndex('linear', 10.0)
+	index = spatial.makeIndex(kind, 10.0)
+	for i, pos in enumerate(positions.tolist()):
+		reference.insert(pos, i)
+	if bulk:
+		index.insertMany(positions, np.arange(len(positions)))
+	else:
+		for i, pos in enumerate(positions.tolist()):
+			index.insert(pos, i)
+	assert len(index) == len(positions)
+
+	for pos in queries(np.random.RandomState(1)).tolist():
+		if len(positions) == 0:
+			assert index.nearest(pos) == None
+		else:
+			assert distances(positions, pos, [index.nearest(pos)]) == distances(positions, pos, [reference.nearest(pos)])
+
+		for k in (1, 3, 10):
+			found = index.kNearest(pos, k)
+			assert len(found) == len(set(found)) == min(k, len(positions))
+			assert distances(positions, pos, found) == distances(positions, pos, reference.kNearest(pos, k))
+
+		for r in (0.0, 5.0, 12.5, 60.0):
+			assert sorted(index.near(pos, r)) == sorted(reference.near(pos, r))
+
+
+@pytest.mark.parametrize('name, positions', [s for s in pointSets() if len(s[1])])
+def test_nearest_many_matches_linear(name, positions):
+	reference = spatial.makeIndex('linear', 10.0)
+	for i, pos in enumerate(positions.tolist()):
+		reference.insert(pos, i)
+
+	points = queries(np.random.RandomState(2))
+	nearest = spatial.nearestMany(positions, points)
+	for pos, i in zip(points.tolist(), nearest.tolist()):
+		assert distances(positions, pos, [i]) == distances(positions, pos, [reference.nearest(pos)])
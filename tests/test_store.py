@@ -0,0 +1,33 @@
+import random
+import numpy as np
+import pytest
+
+import benchmark
+import planners
+import store
+from test_rrt_star import pathCollides
+
+
+@pytest.mark.parametrize('name', ['RRT', 'RRT*'])
+def test_warm_start_reaches_other_goal_at_once(name, tmp_path):
+	obstacles, start, goal = benchmark.randomScenario(0)
+	random.seed(0)
+	np.random.seed(0)
+	grown = planners.makePlanner(name, start, goal, obstacles, True, max_iter = 3000)
+	grown.plan()
+	store.save(str(tmp_path/'map.tree'), grown.tree, obstacles)
+	tree, obstacles = store.load(str(tmp_path/'map.tree'))
+
+	# a goal no stored node reaches within the goal radius
+	other = (600, 580)
+	assert min(np.hypot(*(tree.getPositions() - other).T)) > 10
+	planner = planners.makePlanner(name, (480, 20), other, obstacles, False, warm = tree)
+	path, tree = planner.plan()
+	assert planner.count == 0
+	assert path[0] == (480, 20) and path[-1] == other
+	assert not pathCollides(obstacles, path)
+
+	costs = tree.cost[:len(tree)].copy()
+	for i in range(1, len(tree)):
+		p = tree.parent[i]
+		assert np.isclose(costs[i], costs[p] + np.hypot(*(tree.pos[i] - tree.pos[p])))